@@ -110,6 +110,57 @@ if not DEBUG:
     STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
     DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Survey results tallies: number of counter rows per option/question.
+# Submissions pick a random shard so popular surveys don't contend on one row; 1 disables sharding.
+SURVEY_TALLY_SHARDS = int(os.getenv('SURVEY_TALLY_SHARDS', '8'))
+
+# Cache: shared Redis cache when REDIS_URL is set, otherwise a per-process in-memory cache
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Results caches: crowd results shown to takers of republished surveys are at
+# most SURVEY_CROWD_CACHE_SECONDS old, creator results pages at most
+# SURVEY_RESULTS_CACHE_SECONDS. Stale entries may be served for up to
+# SURVEY_CACHE_STALE_SECONDS longer while the single request that took the
+# rebuild lock (held for at most SURVEY_CACHE_LOCK_SECONDS) rebuilds them.
+# With no entry to serve, other requests wait up to SURVEY_CACHE_WAIT_SECONDS
+# for it before building the results for themselves.
+SURVEY_CROWD_CACHE_SECONDS = int(os.getenv('SURVEY_CROWD_CACHE_SECONDS', '30'))
+SURVEY_RESULTS_CACHE_SECONDS = int(os.getenv('SURVEY_RESULTS_CACHE_SECONDS', '10'))
+SURVEY_CACHE_STALE_SECONDS = int(os.getenv('SURVEY_CACHE_STALE_SECONDS', '300'))
+SURVEY_CACHE_LOCK_SECONDS = int(os.getenv('SURVEY_CACHE_LOCK_SECONDS', '10'))
+SURVEY_CACHE_WAIT_SECONDS = float(os.getenv('SURVEY_CACHE_WAIT_SECONDS', '2'))
+
+# Public survey listings are cached per generation, which every Survey save or delete
+# bumps. With the shared Redis cache that invalidates all workers at once, so the timeout
+# only bounds how long unused pages linger. The per-process LocMem cache only sees bumps
+# made by its own process, so there the timeout is how stale other workers' listings can get.
+SURVEY_LISTING_CACHE_SECONDS = int(
+    os.getenv('SURVEY_LISTING_CACHE_SECONDS', '3600' if os.getenv('REDIS_URL') else '10')
+)
+
+# Rendered question markup of the take-survey pages, cached per survey version
+SURVEY_FRAGMENT_CACHE_SECONDS = int(os.getenv('SURVEY_FRAGMENT_CACHE_SECONDS', '3600'))
+
+# Rows per page on the dashboards, survey list and response table ("Load more" fetches the next page)
+SURVEY_PAGE_SIZE = int(os.getenv('SURVEY_PAGE_SIZE', '25'))
+
+# Rows fetched per round trip from the server-side cursor when streaming a CSV export of responses
+SURVEY_EXPORT_CHUNK_SIZE = int(os.getenv('SURVEY_EXPORT_CHUNK_SIZE', '2000'))
+# Responses converted and written per Parquet row group (needs the optional pyarrow package)
+SURVEY_PARQUET_BATCH_SIZE = int(os.getenv('SURVEY_PARQUET_BATCH_SIZE', '10000'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -1,6 +1,71 @@
 from django.utils.safestring import mark_safe  # Import mark_safe for HTML rendering
-from django.contrib import admin
-from .models import Survey, Question, Option, Answer, Response
+from django.contrib import admin, messages
+from django.contrib.auth.models import User
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import smart_split, unescape_string_literal
+from .models import Survey, Question, Option, Answer, Response, ResultsSnapshot, OptionTally, QuestionTally, touch_survey
+from .exports import stream_responses_csv
+from .pagination import EstimatedCountPaginator
+from .tallies import SurveyTally, tallied_count
+
+
+def counted_options():
+    """Live options, each annotated with its tallied answer count (`answer_count`)."""
+    return Option.objects.filter(is_deleted=False).annotate(answer_count=tallied_count(OptionTally, 'option'))
+
+
+class RelatedSearchAdmin(admin.ModelAdmin):
+    """
+    Admin whose search also matches text on related tables, without joining them.
+    Each search term keeps the rows whose own search_fields match it, unioned with the
+    rows whose related row matches it in related_search_fields. Every branch is an
+    `icontains` on a single table, so each uses that table's trigram index, and no
+    row is ever duplicated.
+    """
+    # {foreign key: (related model, searched field of the related model)}
+    related_search_fields = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        for term in smart_split(search_term):
+            if term[0] in ('"', "'") and term[0] == term[-1]:
+                term = unescape_string_literal(term)
+            own = Q()
+            for field in self.search_fields:
+                own |= Q(**{f'{field}__icontains': term})
+            matches = self.model.objects.filter(own).order_by().values('pk')
+            for foreign_key, (model, field) in self.related_search_fields.items():
+                related = model.objects.filter(**{f'{field}__icontains': term}).order_by().values('pk')
+                matches = matches.union(
+                    self.model.objects.filter(**{f'{foreign_key}__in': related}).order_by().values('pk')
+                )
+            queryset = queryset.filter(pk__in=matches)
+        return queryset, False
+
+
+class TouchesSurveyAdmin(admin.ModelAdmin):
+    """
+    Admin for a survey's questions or options: bumps the survey's version once per save
+    (with its inlines) or delete, so cached survey definitions pick up the edit.
+    """
+    survey_id_lookup = None
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        touch_survey(*self.survey_ids(type(form.instance).objects.filter(pk=form.instance.pk)))
+
+    def delete_model(self, request, obj):
+        survey_ids = self.survey_ids(type(obj).objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+        touch_survey(*survey_ids)
+
+    def delete_queryset(self, request, queryset):
+        survey_ids = self.survey_ids(queryset)
+        super().delete_queryset(request, queryset)
+        touch_survey(*survey_ids)
+
+    def survey_ids(self, queryset):
+        return set(queryset.order_by().values_list(self.survey_id_lookup, flat=True))
 
 
 # Inline Model for Options to show them within the Question
@@ -17,81 +82,209 @@ class QuestionInline(admin.TabularInline):
 
 
 # Custom Admin for Survey
-class SurveyAdmin(admin.ModelAdmin):
+class SurveyAdmin(RelatedSearchAdmin):
     list_display = ('name', 'status', 'creator', 'created_at', 'updated_at', 'get_total_responses', 'display_survey_results')
-    search_fields = ('name', 'creator__username')
+    # The survey name or its creator's username, each matched through its trigram index
+    search_fields = ('name',)
+    related_search_fields = {'creator': (User, 'username')}
     list_filter = ('status', 'creator__username')  # Filter surveys by status and creator
     inlines = [QuestionInline]  # Display questions and options in the survey admin page
+    actions = ['export_responses_csv']
+
+    def get_queryset(self, request):
+        """
+        Load each survey with its response count, its frozen results if closed, and its live
+        questions and counted options, so the changelist runs the same queries for any number of rows.
+        """
+        questions = Question.objects.filter(is_deleted=False).prefetch_related(
+            Prefetch('options', queryset=counted_options(), to_attr='counted_options')
+        )
+        # A correlated subquery rather than a join, so the paginator's count needs no GROUP BY
+        responses = Response.objects.filter(survey=OuterRef('pk')).order_by().values('survey')
+        return (
+            super().get_queryset(request)
+            .select_related('creator', 'results_snapshot')
+            .annotate(total_responses=Coalesce(Subquery(responses.annotate(count=Count('id')).values('count')), 0))
+            .prefetch_related(Prefetch('questions', queryset=questions, to_attr='live_questions'))
+        )
 
     def get_total_responses(self, obj):
-        """Calculate the total number of responses for the survey."""
-        return obj.responses.count()
+        """Return the total number of responses for the survey."""
+        return obj.total_responses
 
     get_total_responses.short_description = 'Total Responses'
+    get_total_responses.admin_order_field = 'total_responses'
 
     def display_survey_results(self, obj):
         """Display survey results in a formatted HTML view."""
-        results = []
-        question_number = 1
+        if obj.status == Survey.CLOSED and hasattr(obj, 'results_snapshot'):
+            return self.display_snapshot(obj.results_snapshot)
 
-        for question in obj.questions.filter(is_deleted=False):
-            options_data = []
-            total_responses = sum(option.answers.count() for option in question.options.filter(is_deleted=False))
+        results = []
+        for question_number, question in enumerate(obj.live_questions, start=1):
+            total_responses = sum(option.answer_count for option in question.counted_options)
 
             # Format the question title
-            question_text = f"<b>Question {question_number}: {question.text}</b>"
-            options_data.append(question_text)
+            options_data = [f"<b>Question {question_number}: {question.text}</b>"]
 
-            # Iterate through each option
-            for option in question.options.filter(is_deleted=False):  # Now filtering options based on is_deleted
-                response_count = option.answers.count()
-                percentage = (response_count / total_responses * 100) if total_responses > 0 else 0
-                options_data.append(f"• {option.text}: {response_count} Users ({percentage:.0f}%)")
+            for option in question.counted_options:
+                percentage = (option.answer_count / total_responses * 100) if total_responses > 0 else 0
+                options_data.append(f"• {option.text}: {option.answer_count} Users ({percentage:.0f}%)")
 
             results.append("<br>".join(options_data))
-            question_number += 1
 
         return mark_safe("<br><br>".join(results)) if results else "No Responses Yet"
 
     display_survey_results.short_description = 'Survey Results'
 
+    @admin.action(description="Export responses as CSV")
+    def export_responses_csv(self, request, queryset):
+        """Stream every response of the selected survey as CSV (one survey at a time: the columns are its questions)."""
+        surveys = list(queryset[:2])
+        if len(surveys) != 1:
+            self.message_user(request, "Select exactly one survey to export.", messages.WARNING)
+            return None
+        return stream_responses_csv(surveys[0])
+
+    def display_snapshot(self, snapshot):
+        """Format the frozen results of a closed survey without querying the answers."""
+        results = []
+        for question_number, question in enumerate(snapshot.results, start=1):
+            options_data = [f"<b>Question {question_number}: {question['text']}</b>"]
+            for option in question['options']:
+                options_data.append(f"• {option['text']}: {option['count']} Users ({option['percentage']:.0f}%)")
+            results.append("<br>".join(options_data))
+
+        return mark_safe("<br><br>".join(results)) if results else "No Responses Yet"
+
 
 # Custom Admin for Question
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(TouchesSurveyAdmin, RelatedSearchAdmin):
+    survey_id_lookup = 'survey_id'
     list_display = ('text', 'survey', 'question_type', 'get_option_counts', 'get_response_percentage')
-    search_fields = ('text', 'survey__name')
+    # The question text or its survey's name, each matched through its trigram index
+    search_fields = ('text',)
+    related_search_fields = {'survey': (Survey, 'name')}
     list_filter = ('question_type',)
 
+    def get_queryset(self, request):
+        """Load each question with its survey, tallied answer total and counted options."""
+        return (
+            super().get_queryset(request)
+            .select_related('survey')
+            .annotate(answer_total=tallied_count(QuestionTally, 'question'))
+            .prefetch_related(Prefetch('options', queryset=counted_options(), to_attr='counted_options'))
+        )
+
     def get_option_counts(self, obj):
         """Show the count of responses for each option."""
-        options = obj.options.filter(is_deleted=False)
-        return ", ".join([f"{option.text}: {option.answers.count()} responses" for option in options])
+        return ", ".join([f"{option.text}: {option.answer_count} responses" for option in obj.counted_options])
 
     get_option_counts.short_description = 'Option Counts'
 
     def get_response_percentage(self, obj):
         """Display percentage of responses for each option."""
-        percentages = obj.get_response_percentage()
-        return ", ".join([f"{option}: {percentage}%" for option, percentage in percentages.items()])
+        if not obj.answer_total:
+            return ""
+        tally = SurveyTally({option.id: option.answer_count for option in obj.counted_options})
+        stats = tally.option_stats(obj.counted_options, total=obj.answer_total, sort_by_count=True)
+        return ", ".join([f"{option['option']}: {option['percentage']}%" for option in stats])
 
     get_response_percentage.short_description = 'Option Percentages'
 
 
 # Custom Admin for Option
-class OptionAdmin(admin.ModelAdmin):
+class OptionAdmin(TouchesSurveyAdmin, RelatedSearchAdmin):
+    survey_id_lookup = 'question__survey_id'
     list_display = ('text', 'question', 'get_response_count')
-    search_fields = ('text', 'question__text')
+    # The option text or its question's text, each matched through its trigram index
+    search_fields = ('text',)
+    related_search_fields = {'question': (Question, 'text')}
+
+    def get_queryset(self, request):
+        """Load each option with its question and survey (for their labels) and its tallied answer count."""
+        return (
+            super().get_queryset(request)
+            .select_related('question__survey')
+            .annotate(answer_count=tallied_count(OptionTally, 'option'))
+        )
 
     def get_response_count(self, obj):
-        """Count the number of responses that selected this option."""
-        return obj.answers.count()
+        """Return the number of responses that selected this option."""
+        return obj.answer_count
 
     get_response_count.short_description = 'Response Count'
+    get_response_count.admin_order_field = 'answer_count'
+
+
+# Custom Admin for Response: lean changelist for tables with millions of rows
+class ResponseAdmin(admin.ModelAdmin):
+    list_display = ('id', 'survey', 'taker', 'submitted_at')
+    list_select_related = ('survey', 'taker')
+    # Plain id inputs instead of <select>s listing every survey and user
+    raw_id_fields = ('survey', 'taker')
+    date_hierarchy = 'submitted_at'
+    paginator = EstimatedCountPaginator
+    # Skip the extra unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+
+
+# Custom Admin for Answer: lean changelist for tables with tens of millions of rows
+class AnswerAdmin(admin.ModelAdmin):
+    list_display = ('id', 'get_taker', 'get_survey', 'get_question', 'get_answer')
+    # Only the columns shown are joined; Answer.__str__ and the related models' __str__ are never called
+    list_select_related = ('response__taker', 'response__survey', 'question', 'selected_option')
+    raw_id_fields = ('response', 'question', 'selected_option')
+    # Free-text answers only, matched through the answer text trigram index
+    search_fields = ('text',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_taker(self, obj):
+        return obj.response.taker.username
+
+    get_taker.short_description = 'Taker'
+
+    def get_survey(self, obj):
+        return obj.response.survey.name
+
+    get_survey.short_description = 'Survey'
+
+    def get_question(self, obj):
+        return obj.question.text
+
+    get_question.short_description = 'Question'
+
+    def get_answer(self, obj):
+        """Show the answer without loading checkbox options (their ids are listed instead)."""
+        if obj.text:
+            return obj.text
+        if obj.selected_option:
+            return obj.selected_option.text
+        if obj.selected_options:
+            return "Options " + ", ".join(f"#{option_id}" for option_id in obj.selected_options)
+        return "No answer provided"
+
+    get_answer.short_description = 'Answer'
+
+
+# Read-only Admin for the frozen results of closed surveys
+class ResultsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('survey', 'total_responses', 'created_at')
+    readonly_fields = ('survey', 'results', 'total_responses', 'created_at')
+    list_select_related = ('survey',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # Register the models with the custom admin classes
 admin.site.register(Survey, SurveyAdmin)
 admin.site.register(Question, QuestionAdmin)
 admin.site.register(Option, OptionAdmin)
-admin.site.register(Answer)
-admin.site.register(Response)
+admin.site.register(Answer, AnswerAdmin)
+admin.site.register(Response, ResponseAdmin)
+admin.site.register(ResultsSnapshot, ResultsSnapshotAdmin)
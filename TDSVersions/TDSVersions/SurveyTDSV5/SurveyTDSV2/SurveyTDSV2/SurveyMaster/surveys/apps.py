@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SurveysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'surveys'
+
+    def ready(self):
+        # Invalidate the public listings when a survey changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,165 @@
+import re
+from collections import namedtuple
+
+from django.db import transaction
+from .models import Option, Question, Survey
+from .ordering import assign_positions
+from .validation import OPTION_QUESTION_TYPES
+
+# One question of a posted survey form, in the order it appears in the form.
+# `key` is the question id for existing questions or "new_<n>" for added ones;
+# `options` is a list of (option_id or None, text), option_id None for added options.
+PostedQuestion = namedtuple('PostedQuestion', ['key', 'text', 'question_type', 'options'])
+
+QUESTION_FIELD = re.compile(r'^questions\[([^\]]+)\]\[(text|type)\]$')
+OPTION_FIELD = re.compile(r'^questions\[([^\]]+)\]\[options\]\[(\d*|new_\d+)\]$')
+
+
+def parse_questions(data):
+    """
+    Parse the nested questions[<key>][text|type|options][...] fields of a survey form in one pass,
+    keeping the order the fields were posted in. Existing options are posted as
+    questions[<key>][options][<option_id>], added ones as questions[<key>][options][new_<n>]
+    (or questions[<key>][options][], whose values all take the place of the first one).
+    Texts are stripped; blank options are dropped.
+    """
+    fields = {}
+    for name, values in data.lists():
+        match = QUESTION_FIELD.match(name)
+        if match:
+            key, field = match.groups()
+            fields.setdefault(key, {'text': None, 'type': None, 'options': None})[field] = values[-1].strip()
+            continue
+        match = OPTION_FIELD.match(name)
+        if match:
+            key, option_id = match.groups()
+            question = fields.setdefault(key, {'text': None, 'type': None, 'options': None})
+            if question['options'] is None:
+                question['options'] = []
+            option_id = int(option_id) if option_id.isdigit() else None
+            question['options'].extend(
+                (option_id, value.strip()) for value in values if value.strip()
+            )
+
+    return [
+        PostedQuestion(key, field['text'], field['type'], field['options'])
+        for key, field in fields.items()
+        # Option fields without a question text field are leftovers of the form, not a question
+        if field['text'] is not None
+    ]
+
+
+def apply_survey_edit(survey, posted_questions):
+    """
+    Apply an edited survey form to the survey's questions and options as a diff, in one transaction.
+    Existing questions and options are matched by id and keep it (so do their answers); only changed
+    rows are updated, added ones are bulk-created and options removed from the form are soft-deleted,
+    so the answers that selected them and the results tallies stay as they are. Questions missing
+    from the form are left untouched. The bulk writes send no signals: saving the survey afterwards
+    bumps its version once. Returns the number of removed options.
+    """
+    with transaction.atomic():
+        questions = survey.questions.in_bulk()
+        options = Option.objects.filter(question__survey=survey, is_deleted=False).in_bulk()
+        options_by_question = {}
+        for option in options.values():
+            options_by_question.setdefault(option.question_id, []).append(option)
+
+        next_position = max((question.position for question in questions.values()), default=0) + 1
+        changed_questions = []
+        new_questions = []
+        # Posted options of each question, matched up once every question has an id
+        question_options = []
+
+        for posted in posted_questions:
+            if posted.key.startswith('new_'):
+                if not posted.text:
+                    continue
+                question = Question(
+                    survey=survey,
+                    text=posted.text,
+                    question_type=posted.question_type or 'text',
+                    position=next_position,
+                )
+                next_position += 1
+                new_questions.append(question)
+            else:
+                question = questions.get(int(posted.key)) if posted.key.isdigit() else None
+                if question is None:
+                    continue
+                question_type = posted.question_type or question.question_type
+                if (question.text, question.question_type) != (posted.text, question_type):
+                    question.text = posted.text
+                    question.question_type = question_type
+                    changed_questions.append(question)
+            if posted.options is not None:
+                question_options.append((question, posted.options))
+
+        Question.objects.bulk_update(changed_questions, ['text', 'question_type'])
+        Question.objects.bulk_create(new_questions)
+
+        changed_options = []
+        new_options = []
+        removed_option_ids = []
+        for question, posted_options in question_options:
+            current = {option.id: option for option in options_by_question.get(question.id, [])}
+            kept = set()
+            for position, (option_id, text) in enumerate(posted_options, start=1):
+                option = current.get(option_id)
+                if option is None or option_id in kept:
+                    new_options.append(Option(question=question, text=text, position=position))
+                    continue
+                kept.add(option_id)
+                if (option.text, option.position) != (text, position):
+                    option.text = text
+                    option.position = position
+                    changed_options.append(option)
+            removed_option_ids.extend(option_id for option_id in current if option_id not in kept)
+
+        Option.objects.bulk_update(changed_options, ['text', 'position'])
+        Option.objects.bulk_create(new_options)
+        Option.objects.filter(id__in=removed_option_ids).update(is_deleted=True)
+
+    return len(removed_option_ids)
+
+
+def build_new_structure(posted_questions):
+    """
+    Turn the questions of a new survey form into unsaved (question, options) pairs, positioned
+    in form order, ready for validation.check_structure. Questions with blank text are ignored,
+    as the form has always done.
+    """
+    questions = []
+    structure = []
+    for posted in posted_questions:
+        if not posted.text:
+            continue
+        question = Question(text=posted.text, question_type=posted.question_type or 'radio')
+        options = []
+        if question.question_type in OPTION_QUESTION_TYPES:
+            options = assign_positions([Option(text=text) for _, text in posted.options or []])
+        questions.append(question)
+        structure.append((question, options))
+    assign_positions(questions)
+    return structure
+
+
+def create_survey_with_questions(creator, name, description, status, structure):
+    """
+    Create a survey with its questions and options in one transaction: one insert for the survey,
+    one bulk insert for the questions and one for the options. `structure` comes from
+    build_new_structure and should have passed validation.check_structure.
+    """
+    with transaction.atomic():
+        survey = Survey.objects.create(creator=creator, name=name, description=description, status=status)
+        for question, _ in structure:
+            question.survey = survey
+        Question.objects.bulk_create([question for question, _ in structure])
+
+        options = []
+        for question, question_options in structure:
+            for option in question_options:
+                option.question = question
+                options.append(option)
+        Option.objects.bulk_create(options)
+    return survey
@@ -0,0 +1,244 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from .models import Survey
+from .pagination import decode_cursor, paginate
+from .submission import compile_survey
+from .tallies import SurveyTally, tally_survey
+
+# Cache events counted per survey (see get_cache_metrics)
+HIT, MISS, STALE, REBUILD = 'hits', 'misses', 'stale', 'rebuilds'
+CACHE_EVENTS = (HIT, MISS, STALE, REBUILD)
+
+# How often a request waiting on another one's rebuild checks for the entry
+CACHE_POLL_SECONDS = 0.05
+
+
+def cache_key(kind, survey_id):
+    return f"surveys:{kind}:{survey_id}"
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _metric_key(kind, survey_id, event):
+    return f"surveys:metrics:{kind}:{survey_id}:{event}"
+
+
+def _record(kind, survey_id, event):
+    """Count a cache event for the survey."""
+    key = _metric_key(kind, survey_id, event)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The counter expired between add() and incr()
+            cache.add(key, 1, timeout=None)
+
+
+def get_cache_metrics(survey_id):
+    """Return {kind: {event: count}} for every results cache of a survey."""
+    keys = {
+        _metric_key(kind, survey_id, event): (kind, event)
+        for kind in BUILDERS
+        for event in CACHE_EVENTS
+    }
+    values = cache.get_many(list(keys))
+    metrics = {kind: dict.fromkeys(CACHE_EVENTS, 0) for kind in BUILDERS}
+    for key, (kind, event) in keys.items():
+        metrics[kind][event] = values.get(key, 0)
+    return metrics
+
+
+def build_crowd_results(survey):
+    """
+    Build the shared "Wisdom of the Crowd" structure for a republished survey.
+    Every taker of the survey reads this same dict:
+      - option_counts: {option_id: count}
+      - aggregated_data: {question_id: [{'option', 'count', 'percentage'}]} sorted by count
+    """
+    tally = tally_survey(survey)
+    aggregated_data = {}
+    for question in compile_survey(survey).questions:
+        total_responses = tally.total(question)
+        aggregated_data[question.id] = (
+            tally.option_stats(question.options, total=total_responses, sort_by_count=True) if total_responses else []
+        )
+
+    return {
+        'option_counts': tally.option_counts,
+        'aggregated_data': aggregated_data,
+        'generated_at': time.time(),
+    }
+
+
+def build_results_tally(survey):
+    """Build the cached option and question counts used by the creator results pages."""
+    tally = tally_survey(survey)
+    return {
+        'option_counts': tally.option_counts,
+        'question_totals': tally.question_totals,
+        'generated_at': time.time(),
+    }
+
+
+# Results caches: kind -> (builder, setting holding the freshness window in seconds)
+BUILDERS = {
+    'crowd': (build_crowd_results, 'SURVEY_CROWD_CACHE_SECONDS'),
+    'results': (build_results_tally, 'SURVEY_RESULTS_CACHE_SECONDS'),
+}
+
+
+def _store(kind, survey):
+    """Rebuild a cache entry and store it with its freshness deadline."""
+    builder, fresh_setting = BUILDERS[kind]
+    fresh_seconds = getattr(settings, fresh_setting)
+    data = builder(survey)
+    entry = {
+        'data': data,
+        'fresh_until': time.time() + fresh_seconds,
+    }
+    # Keep the entry around past its freshness so it can be served while it is rebuilt
+    cache.set(cache_key(kind, survey.id), entry, fresh_seconds + settings.SURVEY_CACHE_STALE_SECONDS)
+    _record(kind, survey.id, REBUILD)
+    return data
+
+
+def _rebuild(kind, survey, lock_key):
+    """Rebuild and store an entry in this request, then release the rebuild lock."""
+    try:
+        return _store(kind, survey)
+    finally:
+        cache.delete(lock_key)
+
+
+def _wait_for_entry(key, lock_key):
+    """
+    Poll for the entry another request is building, for at most SURVEY_CACHE_WAIT_SECONDS.
+    Returns None if it doesn't appear in time, or if the lock is released without it.
+    """
+    deadline = time.monotonic() + settings.SURVEY_CACHE_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(CACHE_POLL_SECONDS)
+        values = cache.get_many([key, lock_key])
+        if key in values or lock_key not in values:
+            return values.get(key)
+    return None
+
+
+def get_cached(kind, survey):
+    """
+    Return the cached data of the given kind for a survey, rebuilding it single-flight.
+    Only the request that takes the short cache lock recomputes and stores the entry, in
+    line; everyone else serves the stale entry. On a miss there is nothing to serve, so
+    they briefly wait for the lock holder's entry, and only build the data for themselves
+    (without storing it) if it isn't there in time.
+    """
+    key = cache_key(kind, survey.id)
+    lock_key = _lock_key(key)
+    entry = cache.get(key)
+
+    if entry is None:
+        _record(kind, survey.id, MISS)
+        if cache.add(lock_key, 1, settings.SURVEY_CACHE_LOCK_SECONDS):
+            return _rebuild(kind, survey, lock_key)
+        entry = _wait_for_entry(key, lock_key)
+        if entry is not None:
+            return entry['data']
+        builder, _ = BUILDERS[kind]
+        return builder(survey)
+
+    if entry['fresh_until'] >= time.time():
+        _record(kind, survey.id, HIT)
+        return entry['data']
+
+    _record(kind, survey.id, STALE)
+    if cache.add(lock_key, 1, settings.SURVEY_CACHE_LOCK_SECONDS):
+        return _rebuild(kind, survey, lock_key)
+    return entry['data']
+
+
+def get_crowd_results(survey):
+    """Return the shared crowd results for a republished survey."""
+    return get_cached('crowd', survey)
+
+
+def get_results_tally(survey):
+    """Return the cached SurveyTally used by the creator results pages."""
+    data = get_cached('results', survey)
+    return SurveyTally(data['option_counts'], data['question_totals'])
+
+
+def question_markup_key(schema, template_name):
+    return f"surveys:questions:{template_name}:{schema.id}:{schema.version}"
+
+
+def get_question_markup(schema, template_name):
+    """
+    Return {question_id: rendered markup} of a compiled survey's questions, as rendered by
+    template_name. The whole list is one cache entry per survey version, so a warm page
+    reads it with a single cache GET and renders its per-request values around it.
+    """
+    key = question_markup_key(schema, template_name)
+    markup = cache.get(key)
+    if markup is None:
+        markup = {
+            question.id: render_to_string(template_name, {'question': question})
+            for question in schema.questions
+        }
+        cache.set(key, markup, settings.SURVEY_FRAGMENT_CACHE_SECONDS)
+    return markup
+
+
+# Public survey listings (taker dashboard, survey list).
+# Pages are cached under a generation number; any change to what takers can
+# see bumps the generation, which orphans every cached page at once.
+LISTINGS_GENERATION_KEY = "surveys:listings:generation"
+
+LISTINGS = {
+    'taker_dashboard': [Survey.PUBLISHED, Survey.REPUBLISHED],
+    'survey_list': [Survey.PUBLISHED],
+}
+
+
+def _new_generation():
+    # Start from the clock so a generation lost with the cache is never reused
+    return int(time.time() * 1000)
+
+
+def listings_generation():
+    """Return the current generation of the public survey listings."""
+    generation = cache.get(LISTINGS_GENERATION_KEY)
+    if generation is None:
+        cache.add(LISTINGS_GENERATION_KEY, _new_generation(), timeout=None)
+        generation = cache.get(LISTINGS_GENERATION_KEY)
+    return generation
+
+
+def bump_listings_generation():
+    """Invalidate every cached listing page; called by the Survey save and delete signals."""
+    try:
+        cache.incr(LISTINGS_GENERATION_KEY)
+    except ValueError:
+        # No generation yet (or it was evicted): start a fresh one
+        cache.set(LISTINGS_GENERATION_KEY, _new_generation(), timeout=None)
+
+
+def get_listing_page(listing, cursor=None):
+    """
+    Return a KeysetPage of the surveys in a public listing, from the cache when possible.
+    Only the first miss per page and generation queries the database. Pages are keyed on the
+    decoded cursor position; an invalid cursor is the first page, never a cache key of its own.
+    """
+    position = decode_cursor(cursor)
+    page_key = 'first' if position is None else f"{position[0].isoformat()}:{position[1]}"
+    key = f"surveys:listing:{listing}:{listings_generation()}:{page_key}"
+    page = cache.get(key)
+    if page is None:
+        surveys = Survey.objects.filter(status__in=LISTINGS[listing], is_deleted=False)
+        page = paginate(surveys, cursor if position is not None else None)
+        cache.set(key, page, settings.SURVEY_LISTING_CACHE_SECONDS)
+    return page
@@ -0,0 +1,209 @@
+import csv
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import StreamingHttpResponse
+from .models import Option, Response
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only the Parquet export needs it
+    pa = pq = None
+
+PARQUET_AVAILABLE = pa is not None
+
+# Leading characters that make spreadsheet applications evaluate a CSV cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object whose write() returns the line instead of storing it, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(survey):
+    """
+    Return the survey's live questions in display order and every option it ever had,
+    as {option id: (question id, text)} in display order (deleted options still label old answers).
+    """
+    questions = list(survey.questions.filter(is_deleted=False).order_by('position', 'id'))
+    options = Option.objects.filter(question__survey=survey).order_by('position', 'id')
+    return questions, {
+        option_id: (question_id, text) for option_id, question_id, text in options.values_list('id', 'question_id', 'text')
+    }
+
+
+def answer_option_ids(row):
+    """Return the ids of the options chosen in an answer row (radio or checkbox)."""
+    if row['answers__selected_options']:
+        return list(row['answers__selected_options'])
+    if row['answers__selected_option_id']:
+        return [row['answers__selected_option_id']]
+    return []
+
+
+def answer_value(row, options):
+    """Format one answer row as a cell: the text, the selected option, or the checkbox options joined by '; '."""
+    if row['answers__text']:
+        return row['answers__text']
+    return "; ".join(options[option_id][1] for option_id in answer_option_ids(row) if option_id in options)
+
+
+def csv_cell(value):
+    """Neutralise user-entered text that a spreadsheet would run as a formula, by prefixing it with a quote."""
+    if value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_responses(survey, chunk_size=None):
+    """
+    Yield (response id, taker, submitted_at, {question id: answer row}) for each response of the survey.
+    Responses and their answers are read as a single LEFT JOIN ordered by response, through a server-side
+    cursor, and pivoted one response at a time, so memory stays flat however many responses there are.
+    """
+    rows = (
+        Response.objects.filter(survey=survey)
+        .order_by('id')
+        .values(
+            'id', 'taker__username', 'submitted_at', 'answers__question_id',
+            'answers__text', 'answers__selected_option_id', 'answers__selected_options',
+        )
+        .iterator(chunk_size=chunk_size or settings.SURVEY_EXPORT_CHUNK_SIZE)
+    )
+    current = None
+    for row in rows:
+        if current is None or row['id'] != current[0]:
+            if current is not None:
+                yield current
+            current = (row['id'], row['taker__username'], row['submitted_at'], {})
+        if row['answers__question_id'] is not None:
+            current[3][row['answers__question_id']] = row
+    if current is not None:
+        yield current
+
+
+def iter_response_rows(survey, chunk_size=None):
+    """
+    Yield the CSV header, then one row per response: id, taker, submitted_at and one column per question.
+    Question texts, usernames and answers are passed through csv_cell.
+    """
+    questions, options = export_columns(survey)
+    yield ['response_id', 'taker', 'submitted_at'] + [csv_cell(question.text) for question in questions]
+
+    for response_id, taker, submitted_at, answers in iter_responses(survey, chunk_size):
+        yield [response_id, csv_cell(taker), submitted_at.isoformat()] + [
+            csv_cell(answer_value(answers[question.id], options)) if question.id in answers else ''
+            for question in questions
+        ]
+
+
+def stream_responses_csv(survey):
+    """Return a StreamingHttpResponse that downloads every response of the survey as CSV."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in iter_response_rows(survey)),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="survey-{survey.id}-responses.csv"'
+    return response
+
+
+def _parquet_columns(questions, options):
+    """
+    Return the Arrow schema of a survey export and, for each option question, its option dictionary:
+    the option texts in display order and each option id's index in it.
+    """
+    dictionaries = {}
+    for option_id, (question_id, text) in options.items():
+        texts, indexes = dictionaries.setdefault(question_id, ([], {}))
+        indexes[option_id] = len(texts)
+        texts.append(text)
+
+    option_type = pa.dictionary(pa.int32(), pa.string())
+    fields = [
+        pa.field('response_id', pa.int64()),
+        pa.field('taker', pa.string()),
+        pa.field('submitted_at', pa.timestamp('us', tz='UTC')),
+    ]
+    names = set()
+    for question in questions:
+        # Column names must be unique; repeated question texts get their position appended
+        name = question.text if question.text not in names else f"{question.text} ({question.position})"
+        names.add(name)
+        if question.question_type == 'radio':
+            fields.append(pa.field(name, option_type))
+        elif question.question_type == 'checkbox':
+            fields.append(pa.field(name, pa.list_(option_type)))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields), {
+        question_id: (pa.array(texts, pa.string()), indexes) for question_id, (texts, indexes) in dictionaries.items()
+    }
+
+
+def _parquet_batch(responses, questions, options, schema, dictionaries):
+    """Convert a batch of pivoted responses into an Arrow record batch, one column per question."""
+    empty = (pa.array([], pa.string()), {})
+    arrays = [
+        pa.array([response[0] for response in responses], pa.int64()),
+        pa.array([response[1] for response in responses], pa.string()),
+        pa.array([response[2] for response in responses], pa.timestamp('us', tz='UTC')),
+    ]
+    for question in questions:
+        answers = [response[3].get(question.id) for response in responses]
+        dictionary, indexes = dictionaries.get(question.id, empty)
+        if question.question_type == 'radio':
+            # Indices into the question's option dictionary; null when unanswered
+            selected = [
+                indexes.get(answer['answers__selected_option_id']) if answer else None for answer in answers
+            ]
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(selected, pa.int32()), dictionary))
+        elif question.question_type == 'checkbox':
+            offsets, selected, unanswered = [0], [], []
+            for answer in answers:
+                if answer:
+                    selected.extend(indexes[option_id] for option_id in answer_option_ids(answer) if option_id in indexes)
+                offsets.append(len(selected))
+                unanswered.append(answer is None)
+            values = pa.DictionaryArray.from_arrays(pa.array(selected, pa.int32()), dictionary)
+            arrays.append(pa.ListArray.from_arrays(
+                pa.array(offsets, pa.int32()), values, mask=pa.array(unanswered, pa.bool_())
+            ))
+        else:
+            arrays.append(pa.array([answer_value(answer, options) if answer else None for answer in answers], pa.string()))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def write_responses_parquet(survey, destination, batch_size=None):
+    """
+    Write every response of the survey to `destination` (a path or binary file) as Parquet:
+    response_id, taker, submitted_at and one column per question. Option questions are
+    dictionary-encoded (checkbox questions as lists) with the question's options as the dictionary.
+    Responses are streamed from the database and converted `batch_size` at a time, each batch
+    written as one row group, so the survey is never held in memory. Returns the number of responses.
+    """
+    if pa is None:
+        raise ImproperlyConfigured("Parquet exports require pyarrow (pip install pyarrow).")
+
+    batch_size = batch_size or settings.SURVEY_PARQUET_BATCH_SIZE
+    questions, options = export_columns(survey)
+    schema, dictionaries = _parquet_columns(questions, options)
+
+    total = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        batch = []
+        for response in iter_responses(survey):
+            batch.append(response)
+            if len(batch) >= batch_size:
+                writer.write_batch(_parquet_batch(batch, questions, options, schema, dictionaries))
+                total += len(batch)
+                batch = []
+        if batch or not total:
+            # Always write a row group so an empty survey still yields a readable file with its schema
+            writer.write_batch(_parquet_batch(batch, questions, options, schema, dictionaries))
+            total += len(batch)
+    return total
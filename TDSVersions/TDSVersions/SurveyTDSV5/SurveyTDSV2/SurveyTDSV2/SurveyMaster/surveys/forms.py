@@ -68,7 +68,8 @@ class OptionForm(forms.ModelForm):
         return text
 
 
-# Form for taking a survey
+# Form for taking a survey, built from the compiled survey definition
+# (`questions` is CompiledSurvey.questions, see submission.compile_survey)
 class TakeSurveyForm(forms.Form):
     def __init__(self, *args, **kwargs):
         questions = kwargs.pop('questions', None)
@@ -85,14 +86,14 @@ class TakeSurveyForm(forms.Form):
                 elif question.question_type == 'radio':  # Changed 'multiple_choice' to 'radio'
                     self.fields[field_name] = forms.ChoiceField(
                         label=question.text,
-                        choices=[(option.id, option.text) for option in question.options.all()],
+                        choices=[(option.id, option.text) for option in question.options],
                         widget=forms.RadioSelect,
                         required=True
                     )
                 elif question.question_type == 'checkbox':
                     self.fields[field_name] = forms.MultipleChoiceField(
                         label=question.text,
-                        choices=[(option.id, option.text) for option in question.options.all()],
+                        choices=[(option.id, option.text) for option in question.options],
                         widget=forms.CheckboxSelectMultiple,
                         required=True
                     )
@@ -0,0 +1,132 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from surveys.models import Survey, Question, Option, Response, Answer
+from surveys.pagination import paginate
+
+WORDS = (
+    "service delivery support price quality staff website checkout parking waiting friendly "
+    "slow fast helpful clean noisy expensive cheap easy confusing great terrible average"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with free-text answers and time the response search of survey_response_table "
+        "and the survey, question, option and answer admin changelists searching for a term. "
+        "On PostgreSQL, also shows whether the query plans use the trigram indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--surveys', type=int, default=20, help="Surveys to create.")
+        parser.add_argument('--takers', type=int, default=1000, help="Takers answering every survey.")
+        parser.add_argument('--questions', type=int, default=5, help="Text questions per survey.")
+        parser.add_argument('--runs', type=int, default=20, help="Runs per measurement.")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Rows per bulk insert.")
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:12]
+        creator = User.objects.create_user(f"bench-{tag}", is_staff=True)
+        takers = User.objects.bulk_create(
+            [User(username=f"bench-{tag}-{number}") for number in range(options['takers'])],
+            batch_size=options['batch_size'],
+        )
+        try:
+            surveys = self.create_answers(creator, takers, tag, options)
+            total = options['surveys'] * options['takers'] * options['questions']
+            self.stdout.write(f"{total} text answers in {options['surveys']} surveys, {options['runs']} runs per measurement")
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE surveys_answer")
+
+            survey = surveys[0]
+            # A word in every answer and a marker only a few answers contain
+            for term in ('delivery', f'marker{tag}'):
+                matching = Answer.objects.filter(question__survey=survey, text__icontains=term).values('response')
+                responses = Response.objects.filter(survey=survey, id__in=matching).select_related('taker')
+                self.measure(
+                    f"response search '{term}' (first page)",
+                    lambda: paginate(responses, field='submitted_at'),
+                    responses.order_by('-submitted_at', '-id'),
+                    options['runs'],
+                )
+
+            # The changelist queries the admin runs for a search: its count and its first page
+            admin_user = User.objects.create_superuser(f"bench-{tag}-admin")
+            searches = (
+                ("admin answer search", Answer, f'marker{tag}'),
+                ("admin question search", Question, f'question {tag}'),
+                ("admin option search", Option, f'option {tag}'),
+                ("admin survey search", Survey, f'search {tag} 1'),
+                # Terms matching only related rows: the creator, the survey, the question
+                ("admin survey search by creator", Survey, f'bench-{tag}'),
+                ("admin question search by survey", Question, f'search {tag} 1'),
+                ("admin option search by question", Option, f'question {tag} 1'),
+            )
+            for label, model, term in searches:
+                request = RequestFactory().get('/admin/', {'q': term})
+                request.user = admin_user
+                model_admin = admin.site._registry[model]
+                changelist = model_admin.get_changelist_instance(request)
+                self.measure(
+                    label,
+                    lambda: list(model_admin.get_changelist_instance(request).result_list),
+                    changelist.queryset,
+                    options['runs'],
+                )
+        finally:
+            # Removes the surveys, questions, responses and answers through the cascade
+            User.objects.filter(username__startswith=f"bench-{tag}").delete()
+
+    def create_answers(self, creator, takers, tag, options):
+        """Create the surveys and one answer per taker and question; every 500th taker also writes a marker word."""
+        rng = random.Random(0)
+        surveys = Survey.objects.bulk_create([
+            Survey(creator=creator, name=f"Search {tag} {number}", status=Survey.PUBLISHED)
+            for number in range(1, options['surveys'] + 1)
+        ])
+        for survey in surveys:
+            questions = Question.objects.bulk_create([
+                Question(survey=survey, text=f"Question {tag} {position}", question_type='text', position=position)
+                for position in range(1, options['questions'] + 1)
+            ])
+            Option.objects.bulk_create([
+                Option(question=question, text=f"Option {tag} {position}", position=position)
+                for question in questions
+                for position in range(1, 5)
+            ])
+            responses = Response.objects.bulk_create(
+                [Response(survey=survey, taker=taker) for taker in takers], batch_size=options['batch_size']
+            )
+            answers = []
+            for number, response in enumerate(responses):
+                for question in questions:
+                    words = rng.sample(WORDS, 8)
+                    if number % 500 == 0:
+                        words.append(f"marker{tag}")
+                    answers.append(Answer(response=response, question=question, text=" ".join(words)))
+                if len(answers) >= options['batch_size']:
+                    Answer.objects.bulk_create(answers)
+                    answers = []
+            Answer.objects.bulk_create(answers)
+        return surveys
+
+    def measure(self, label, run, queryset, runs):
+        """Time `runs` calls of `run` in ms; on PostgreSQL, report whether the plan of `queryset` uses a trigram index."""
+        timings = []
+        for _ in range(runs):
+            began = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - began) * 1000)
+        self.stdout.write(f"{label}: median={statistics.median(timings):.1f}ms max={max(timings):.1f}ms")
+        if connection.vendor == 'postgresql':
+            plan = queryset.explain()
+            uses_index = 'trgm_idx' in plan
+            self.stdout.write(f"  {'uses a trigram index' if uses_index else 'no trigram index in plan'}")
@@ -0,0 +1,101 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from surveys.caching import get_crowd_results, get_question_markup, question_markup_key
+from surveys.models import Survey, Question, Option
+from surveys.submission import compile_survey
+
+
+class Command(BaseCommand):
+    help = (
+        "Render take_survey.html and republished_survey_taker.html for a large survey with the "
+        "cached question markup cold and warm, and report the render times."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=300, help="Questions in the benchmark survey.")
+        parser.add_argument('--options', type=int, default=6, help="Options per question.")
+        parser.add_argument('--renders', type=int, default=20, help="Renders per measurement.")
+
+    def handle(self, *args, **options):
+        creator = User.objects.create_user(f"bench-{uuid.uuid4().hex[:12]}", is_staff=True)
+        try:
+            survey = self.create_survey(creator, options['questions'], options['options'])
+            self.stdout.write(
+                f"Survey with {options['questions']} questions x {options['options']} options, "
+                f"{options['renders']} renders per measurement"
+            )
+            for status, template, question_template in (
+                (Survey.PUBLISHED, 'surveys/take_survey.html', 'surveys/take_survey_question.html'),
+                (Survey.REPUBLISHED, 'surveys/republished_survey_taker.html', 'surveys/republished_survey_question.html'),
+            ):
+                survey.status = status
+                survey.save()
+                context = self.build_context(survey)
+                schema = compile_survey(survey)
+                markup_key = question_markup_key(schema, question_template)
+                cold = self.measure(
+                    template, context, question_template, schema, options['renders'],
+                    before=lambda: cache.delete(markup_key),
+                )
+                warm = self.measure(template, context, question_template, schema, options['renders'])
+                self.stdout.write(
+                    f"{template}: cold median={statistics.median(cold):.1f}ms "
+                    f"warm median={statistics.median(warm):.1f}ms "
+                    f"({statistics.median(cold) / max(statistics.median(warm), 0.001):.1f}x)"
+                )
+        finally:
+            # Removes the survey, its questions and options through the cascade
+            creator.delete()
+
+    def create_survey(self, creator, question_count, option_count):
+        survey = Survey.objects.create(creator=creator, name="Render benchmark", status=Survey.PUBLISHED)
+        questions = Question.objects.bulk_create([
+            Question(
+                survey=survey,
+                text=f"Question {position}",
+                question_type='checkbox' if position % 2 else 'radio',
+                position=position,
+            )
+            for position in range(1, question_count + 1)
+        ])
+        Option.objects.bulk_create([
+            Option(question=question, text=f"Option {position} of {question.text}", position=position)
+            for question in questions
+            for position in range(1, option_count + 1)
+        ])
+        survey.refresh_from_db()
+        return survey
+
+    def build_context(self, survey):
+        """The context take_survey / take_republished_survey pass to their templates."""
+        crowd = get_crowd_results(survey) if survey.status == Survey.REPUBLISHED else None
+        return {
+            'survey': survey,
+            'questions': compile_survey(survey).questions,
+            'aggregated_results': crowd['aggregated_data'] if crowd else {},
+            'option_counts': crowd['option_counts'] if crowd else {},
+        }
+
+    def measure(self, template, context, question_template, schema, renders, before=None):
+        """
+        Read the question markup and render the template `renders` times (each with a fresh
+        request and CSRF token), as the views do; return the times in ms.
+        """
+        timings = []
+        for _ in range(renders):
+            if before:
+                before()
+            request = RequestFactory().get('/')
+            request.user = AnonymousUser()
+            began = time.perf_counter()
+            question_markup = get_question_markup(schema, question_template)
+            render_to_string(template, {**context, 'question_markup': question_markup}, request=request)
+            timings.append((time.perf_counter() - began) * 1000)
+        return timings
@@ -0,0 +1,99 @@
+import contextlib
+import io
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from surveys.models import Survey, Question, Option
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of latencies (nearest-rank)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent submissions against take_survey with tally sharding off and on, "
+        "and compare submission latency. Use a PostgreSQL database for meaningful numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help="Concurrent submitters.")
+        parser.add_argument('--submissions', type=int, default=25, help="Submissions per thread.")
+        parser.add_argument('--questions', type=int, default=5, help="Radio questions in the benchmark survey.")
+        parser.add_argument('--shards', type=int, default=8, help="Shard count for the sharded run.")
+
+    def handle(self, *args, **options):
+        creator = User.objects.create_user(f"bench-{uuid.uuid4().hex[:12]}", is_staff=True)
+        try:
+            survey = self.create_survey(creator, options['questions'])
+            for shards in (1, options['shards']):
+                latencies = self.run(survey, shards, options['threads'], options['submissions'])
+                label = "off" if shards == 1 else f"on ({shards} shards)"
+                self.stdout.write(
+                    f"Sharding {label}: {len(latencies)} submissions, "
+                    f"p50={percentile(latencies, 50):.1f}ms "
+                    f"p95={percentile(latencies, 95):.1f}ms "
+                    f"p99={percentile(latencies, 99):.1f}ms "
+                    f"mean={statistics.mean(latencies):.1f}ms"
+                )
+        finally:
+            # Removes the survey, its answers and tallies through the cascade
+            User.objects.filter(username__startswith=creator.username).delete()
+
+    def create_survey(self, creator, question_count):
+        """Create a published survey whose answers all land on the same few options."""
+        survey = Survey.objects.create(creator=creator, name="Tally contention benchmark", status=Survey.PUBLISHED)
+        for position in range(1, question_count + 1):
+            question = Question.objects.create(survey=survey, text=f"Question {position}", question_type='radio', position=position)
+            for option_position in range(1, 4):
+                Option.objects.create(question=question, text=f"Option {option_position}", position=option_position)
+        return survey
+
+    def run(self, survey, shards, thread_count, submissions):
+        """Submit the survey from `thread_count` threads at once and return every latency in ms."""
+        questions = list(survey.questions.prefetch_related('options'))
+        # Every taker picks the first option, which is the hot row being measured
+        post_data = {f"question_{question.id}": str(question.options.all()[0].id) for question in questions}
+        url = reverse('take_survey', args=[survey.id])
+
+        takers = [
+            User.objects.create_user(f"{survey.creator.username}-{shards}-{i}-{n}")
+            for i in range(thread_count)
+            for n in range(submissions)
+        ]
+        latencies = []
+        lock = threading.Lock()
+        start = threading.Barrier(thread_count)
+
+        def worker(offset):
+            client = Client(HTTP_HOST='localhost')
+            timings = []
+            try:
+                start.wait()
+                for taker in takers[offset * submissions:(offset + 1) * submissions]:
+                    client.force_login(taker)
+                    began = time.perf_counter()
+                    client.post(url, post_data)
+                    timings.append((time.perf_counter() - began) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(timings)
+
+        with override_settings(SURVEY_TALLY_SHARDS=shards), contextlib.redirect_stdout(io.StringIO()):
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return latencies
@@ -0,0 +1,150 @@
+import random
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from surveys.caching import LISTINGS
+from surveys.models import Survey, Question, Option, Response, Answer, OptionTally
+
+
+class Rollback(Exception):
+    """Raised to discard the generated dataset once the plans have been printed."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large survey dataset, then print the EXPLAIN plan of every dashboard, "
+        "listing and results query. The dataset is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--creators', type=int, default=20)
+        parser.add_argument('--surveys', type=int, default=5000, help="Surveys spread across creators and statuses.")
+        parser.add_argument('--questions', type=int, default=10, help="Radio questions per answered survey.")
+        parser.add_argument('--options', type=int, default=4, help="Options per question.")
+        parser.add_argument('--responses', type=int, default=20000, help="Responses spread across the answered surveys.")
+        parser.add_argument('--answered-surveys', type=int, default=20, help="How many surveys receive responses.")
+        parser.add_argument('--keep', action='store_true', help="Keep the generated data instead of rolling it back.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                creator, taker, survey, question, option = self.generate(options)
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                self.explain_all(creator, taker, survey, question, option)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("Generated data rolled back."))
+
+    def generate(self, options):
+        prefix = f"explain-{uuid.uuid4().hex[:8]}"
+        self.stdout.write(f"Generating dataset '{prefix}'...")
+        creators = User.objects.bulk_create([
+            User(username=f"{prefix}-creator-{i}", is_staff=True) for i in range(options['creators'])
+        ])
+        statuses = [Survey.DRAFT, Survey.PUBLISHED, Survey.REPUBLISHED, Survey.CLOSED]
+        surveys = Survey.objects.bulk_create([
+            Survey(
+                creator=creators[i % len(creators)],
+                name=f"{prefix} survey {i}",
+                status=statuses[i % len(statuses)],
+                is_deleted=(i % 10 == 0),
+            )
+            for i in range(options['surveys'])
+        ], batch_size=1000)
+
+        answered = [survey for survey in surveys if survey.status == Survey.PUBLISHED][:options['answered_surveys']]
+        questions = Question.objects.bulk_create([
+            Question(survey=survey, text=f"Question {position}", question_type='radio', position=position)
+            for survey in answered
+            for position in range(1, options['questions'] + 1)
+        ], batch_size=1000)
+        option_rows = Option.objects.bulk_create([
+            Option(question=question, text=f"Option {position}", position=position)
+            for question in questions
+            for position in range(1, options['options'] + 1)
+        ], batch_size=1000)
+        options_by_question = {}
+        for option in option_rows:
+            options_by_question.setdefault(option.question_id, []).append(option)
+        questions_by_survey = {}
+        for question in questions:
+            questions_by_survey.setdefault(question.survey_id, []).append(question)
+
+        takers = User.objects.bulk_create([
+            User(username=f"{prefix}-taker-{i}") for i in range(options['responses'])
+        ], batch_size=1000)
+        responses = Response.objects.bulk_create([
+            Response(survey=answered[i % len(answered)], taker=taker) for i, taker in enumerate(takers)
+        ], batch_size=1000)
+
+        batch = []
+        for response in responses:
+            for question in questions_by_survey[response.survey_id]:
+                batch.append(Answer(
+                    response=response,
+                    question=question,
+                    selected_option=random.choice(options_by_question[question.id]),
+                ))
+            if len(batch) >= 5000:
+                Answer.objects.bulk_create(batch)
+                batch = []
+        Answer.objects.bulk_create(batch)
+        self.stdout.write(
+            f"{len(surveys)} surveys, {len(questions)} questions, {len(option_rows)} options, "
+            f"{len(responses)} responses, {len(responses) * options['questions']} answers"
+        )
+
+        survey = answered[0]
+        question = questions_by_survey[survey.id][0]
+        return creators[0], takers[0], survey, question, options_by_question[question.id][0]
+
+    def explain_all(self, creator, taker, survey, question, option):
+        page_size = settings.SURVEY_PAGE_SIZE
+        # A dashboard section: live surveys of one status with their response stats, as views.creator_dashboard
+        responses = Response.objects.filter(survey=OuterRef('pk')).order_by().values('survey')
+        section = (
+            Survey.objects.filter(is_deleted=False, status=Survey.PUBLISHED)
+            .annotate(
+                response_count=Coalesce(Subquery(responses.annotate(count=Count('id')).values('count')), 0),
+                last_response_at=Subquery(responses.annotate(last=Max('submitted_at')).values('last')),
+            )
+            .order_by('-created_at', '-id')
+        )
+        # The position a "Load more" cursor decodes to, half way down the creator's section
+        middle = section.filter(creator=creator)[page_size * 2:page_size * 2 + 1].first() or survey
+        after_middle = Q(created_at__lt=middle.created_at) | Q(created_at=middle.created_at, id__lt=middle.id)
+        listing = Survey.objects.filter(status__in=LISTINGS['taker_dashboard'], is_deleted=False).order_by('-created_at', '-id')
+        listing_ids = list(listing.values_list('id', flat=True)[:page_size])
+
+        queries = {
+            "Creator dashboard section (first page)": section.filter(creator=creator)[:page_size + 1],
+            "Creator dashboard section (next page)": section.filter(after_middle, creator=creator)[:page_size + 1],
+            "Superuser dashboard section (first page)": section[:page_size + 1],
+            "Taker dashboard listing (first page)": listing[:page_size + 1],
+            "Taker dashboard listing (next page)": listing.filter(after_middle)[:page_size + 1],
+            "Listed surveys the taker has answered": (
+                Response.objects.filter(taker=taker, survey_id__in=listing_ids).values_list('survey_id', flat=True)
+            ),
+            "Survey questions in order": Question.objects.filter(survey=survey, is_deleted=False).order_by('position', 'id'),
+            "Live options of the questions": Option.objects.filter(question=question, is_deleted=False),
+            "Precomputed option tallies (summed shards)": (
+                OptionTally.objects.filter(survey=survey).order_by().values('option_id').annotate(total=Sum('count'))
+            ),
+            "Tally rebuild (answers grouped by question and option)": (
+                Answer.objects.filter(question__survey=survey).order_by()
+                .values('question_id', 'selected_option_id').annotate(count=Count('id'))
+            ),
+            "Response table (first page)": Response.objects.filter(survey=survey).order_by('-submitted_at', '-id')[:page_size + 1],
+            "Has the taker answered the survey": Response.objects.filter(survey=survey, taker=taker),
+        }
+        for title, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
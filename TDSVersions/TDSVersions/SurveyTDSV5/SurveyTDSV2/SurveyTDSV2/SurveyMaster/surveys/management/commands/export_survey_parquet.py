@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from surveys.exports import PARQUET_AVAILABLE, write_responses_parquet
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a survey's responses to a Parquet file, one column per question "
+        "(option questions dictionary-encoded). Requires pyarrow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey_id', type=int, help="Survey to export.")
+        parser.add_argument('output', help="Path of the Parquet file to write.")
+        parser.add_argument('--batch-size', type=int, help="Responses per row group (default: SURVEY_PARQUET_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        if not PARQUET_AVAILABLE:
+            raise CommandError("Parquet exports require pyarrow (pip install pyarrow).")
+        try:
+            survey = Survey.objects.get(id=options['survey_id'])
+        except Survey.DoesNotExist:
+            raise CommandError(f"Survey {options['survey_id']} does not exist.")
+
+        began = time.perf_counter()
+        count = write_responses_parquet(survey, options['output'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} responses of survey {survey.id} to {options['output']} "
+            f"in {time.perf_counter() - began:.1f}s."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from surveys.models import Survey
+from surveys.tallies import rebuild_survey_tallies
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed option and question tallies from the Answer table (backfill or drift repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey_ids', nargs='*', type=int, help="Only rebuild these surveys (default: all surveys).")
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.all().order_by('id')
+        if options['survey_ids']:
+            surveys = surveys.filter(id__in=options['survey_ids'])
+
+        rebuilt = 0
+        for survey in surveys.iterator():
+            tally = rebuild_survey_tallies(survey)
+            rebuilt += 1
+            self.stdout.write(
+                f"Survey {survey.id}: {len(tally.option_counts)} options, "
+                f"{sum(tally.question_totals.values())} answers"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt tallies for {rebuilt} survey(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from surveys.caching import CACHE_EVENTS, get_cache_metrics
+from surveys.models import Survey
+
+
+class Command(BaseCommand):
+    help = "Show hit, miss, stale-serve and rebuild counts of the results and crowd caches per survey."
+
+    def add_arguments(self, parser):
+        parser.add_argument('survey_ids', nargs='*', type=int, help="Only show these surveys (default: published and republished surveys).")
+
+    def handle(self, *args, **options):
+        if options['survey_ids']:
+            survey_ids = options['survey_ids']
+        else:
+            survey_ids = Survey.objects.filter(
+                status__in=[Survey.PUBLISHED, Survey.REPUBLISHED], is_deleted=False
+            ).order_by('id').values_list('id', flat=True)
+
+        self.stdout.write("survey  cache    " + "  ".join(f"{event:>8}" for event in CACHE_EVENTS))
+        for survey_id in survey_ids:
+            for kind, counts in get_cache_metrics(survey_id).items():
+                self.stdout.write(
+                    f"{survey_id:<7} {kind:<8} " + "  ".join(f"{counts[event]:>8}" for event in CACHE_EVENTS)
+                )
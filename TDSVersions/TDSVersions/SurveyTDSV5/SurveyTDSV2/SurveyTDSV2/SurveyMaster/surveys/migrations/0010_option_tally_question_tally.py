@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0009_option_is_deleted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('option', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tally', to='surveys.option')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='option_tallies', to='surveys.survey')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tally', to='surveys.question')),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_tallies', to='surveys.survey')),
+            ],
+        ),
+    ]
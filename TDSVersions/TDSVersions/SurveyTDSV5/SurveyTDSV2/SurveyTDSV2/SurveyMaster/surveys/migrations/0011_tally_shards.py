@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0010_option_tally_question_tally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='optiontally',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='questiontally',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='optiontally',
+            name='option',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.option'),
+        ),
+        migrations.AlterField(
+            model_name='questiontally',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='surveys.question'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='optiontally',
+            unique_together={('option', 'shard')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='questiontally',
+            unique_together={('question', 'shard')},
+        ),
+    ]
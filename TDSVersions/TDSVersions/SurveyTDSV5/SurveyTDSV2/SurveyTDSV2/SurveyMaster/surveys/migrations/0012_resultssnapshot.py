@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0011_tally_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('results', models.JSONField(default=list)),
+                ('total_responses', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('survey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='results_snapshot', to='surveys.survey')),
+            ],
+        ),
+    ]
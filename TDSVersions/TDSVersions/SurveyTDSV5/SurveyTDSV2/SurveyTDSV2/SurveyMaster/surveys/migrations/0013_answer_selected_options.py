@@ -0,0 +1,55 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+def pack_checkbox_answers(apps, schema_editor):
+    """Fold one-row-per-option checkbox answers into a single row per response and question."""
+    Answer = apps.get_model('surveys', 'Answer')
+    rows = (
+        Answer.objects.filter(question__question_type='checkbox', selected_option__isnull=False)
+        .order_by('response_id', 'question_id', 'id')
+        .values_list('id', 'response_id', 'question_id', 'selected_option_id')
+    )
+
+    def flush(group):
+        keep_id = group[0][0]
+        option_ids = sorted({row[3] for row in group})
+        Answer.objects.filter(id=keep_id).update(selected_option=None, selected_options=option_ids)
+        extra_ids = [row[0] for row in group[1:]]
+        if extra_ids:
+            Answer.objects.filter(id__in=extra_ids).delete()
+
+    group = []
+    for row in rows.iterator(chunk_size=2000):
+        if group and row[1:3] != group[0][1:3]:
+            flush(group)
+            group = []
+        group.append(row)
+    if group:
+        flush(group)
+
+
+def unpack_checkbox_answers(apps, schema_editor):
+    """Move packed checkbox answers back to selected_option (the first option of each answer)."""
+    Answer = apps.get_model('surveys', 'Answer')
+    for answer in Answer.objects.filter(selected_options__isnull=False).iterator(chunk_size=2000):
+        answer.selected_option_id = answer.selected_options[0] if answer.selected_options else None
+        answer.selected_options = None
+        answer.save(update_fields=['selected_option', 'selected_options'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0012_resultssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='selected_options',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_checkbox_answers, unpack_checkbox_answers),
+    ]
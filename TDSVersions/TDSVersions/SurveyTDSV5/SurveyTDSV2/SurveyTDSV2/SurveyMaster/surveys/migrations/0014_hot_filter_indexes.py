@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+from surveys.migrations._indexes import AddIndexOnLargeTable
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0013_answer_selected_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexOnLargeTable(
+            model_name='answer',
+            index=models.Index(fields=['question', 'selected_option'], name='answer_question_option_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['survey', 'position'], name='question_live_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['creator', 'status', '-created_at', '-id'], name='survey_creator_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['status', '-created_at', '-id'], name='survey_live_status_idx'),
+        ),
+    ]
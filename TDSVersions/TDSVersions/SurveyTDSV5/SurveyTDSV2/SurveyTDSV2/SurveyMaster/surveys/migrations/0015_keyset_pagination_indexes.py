@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+from surveys.migrations._indexes import AddIndexOnLargeTable
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0014_hot_filter_indexes'),
+    ]
+
+    operations = [
+        AddIndexOnLargeTable(
+            model_name='response',
+            index=models.Index(fields=['survey', '-submitted_at', '-id'], name='response_survey_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='survey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-created_at', '-id'], name='survey_live_recent_idx'),
+        ),
+    ]
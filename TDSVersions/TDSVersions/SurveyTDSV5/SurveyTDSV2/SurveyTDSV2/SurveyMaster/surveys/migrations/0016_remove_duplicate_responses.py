@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:34
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+from surveys.migrations._tallies import rebuild_tallies
+
+
+def remove_duplicate_responses(apps, schema_editor):
+    """
+    Keep only the first response of each taker to a survey, so the unique constraint can be added.
+    The answers of the removed responses are deleted with them (see the README upgrade notes),
+    and the tallies of the affected surveys are recounted from the remaining answers.
+    """
+    Response = apps.get_model('surveys', 'Response')
+    duplicates = (
+        Response.objects.order_by()
+        .values('survey_id', 'taker_id')
+        .annotate(count=Count('id'), first_id=Min('id'))
+        .filter(count__gt=1)
+    )
+    affected_surveys = set()
+    for duplicate in duplicates.iterator():
+        Response.objects.filter(
+            survey_id=duplicate['survey_id'],
+            taker_id=duplicate['taker_id'],
+        ).exclude(id=duplicate['first_id']).delete()
+        affected_surveys.add(duplicate['survey_id'])
+    rebuild_tallies(apps, sorted(affected_surveys))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0015_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        # Kept apart from the constraint migration: PostgreSQL can't alter a table
+        # with pending deferred foreign key checks from the deletes in the same transaction
+        migrations.RunPython(remove_duplicate_responses, migrations.RunPython.noop),
+    ]
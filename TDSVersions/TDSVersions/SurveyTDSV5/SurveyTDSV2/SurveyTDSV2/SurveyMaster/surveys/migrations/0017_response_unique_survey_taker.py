@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0016_remove_duplicate_responses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='response',
+            constraint=models.UniqueConstraint(fields=('survey', 'taker'), name='response_unique_survey_taker', violation_error_message='A user can only submit one response per survey.'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0017_response_unique_survey_taker'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='option',
+            index=models.Index(fields=['question', 'position'], name='option_question_position_idx'),
+        ),
+    ]
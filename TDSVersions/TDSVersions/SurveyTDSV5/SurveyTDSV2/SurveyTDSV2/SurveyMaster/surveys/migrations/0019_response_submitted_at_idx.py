@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+from surveys.migrations._indexes import AddIndexOnLargeTable
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0018_option_question_position_idx'),
+    ]
+
+    operations = [
+        AddIndexOnLargeTable(
+            model_name='response',
+            index=models.Index(fields=['submitted_at'], name='response_submitted_at_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:52
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+from surveys.migrations._trigrams import AddTrigramIndex, EnableTrigrams
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0019_response_submitted_at_idx'),
+    ]
+
+    operations = [
+        EnableTrigrams(),
+        AddTrigramIndex(
+            model_name='answer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('text', output_field=models.TextField())), name='gin_trgm_ops'), condition=models.Q(('text__isnull', False)), name='answer_text_trgm_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='question',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('text', output_field=models.TextField())), name='gin_trgm_ops'), name='question_text_trgm_idx'),
+        ),
+        AddTrigramIndex(
+            model_name='survey',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('name', output_field=models.TextField())), name='gin_trgm_ops'), name='survey_name_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from surveys.migrations._tallies import rebuild_tallies
+
+
+def backfill_tallies(apps, schema_editor):
+    """
+    Fill the tally tables (created empty by 0010) for every survey that has answers but no
+    tallies yet, so results pages show the existing responses without a manual rebuild_tallies.
+    Runs after checkbox answers are packed (0013) and duplicate responses removed (0016).
+    """
+    Answer = apps.get_model('surveys', 'Answer')
+    QuestionTally = apps.get_model('surveys', 'QuestionTally')
+    answered = set(Answer.objects.order_by().values_list('question__survey_id', flat=True).distinct())
+    tallied = set(QuestionTally.objects.order_by().values_list('survey_id', flat=True).distinct())
+    rebuild_tallies(apps, sorted(answered - tallied))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0020_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:29
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+from surveys.migrations._trigrams import AddTrigramIndex
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('surveys', '0021_backfill_tallies'),
+    ]
+
+    operations = [
+        AddTrigramIndex(
+            model_name='option',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('text', output_field=models.TextField())), name='gin_trgm_ops'), name='option_text_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import migrations
+
+from surveys.migrations._trigrams import RunPostgresSQL
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('surveys', '0022_option_text_trigram_index'),
+    ]
+
+    operations = [
+        # The survey admin searches creators by username (auth_user belongs to django.contrib.auth,
+        # so the index is raw SQL on the same expression as models.trigram_index)
+        RunPostgresSQL(
+            sql=(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_username_trgm_idx '
+                'ON auth_user USING gin ((UPPER(username::text)) gin_trgm_ops)'
+            ),
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS auth_user_username_trgm_idx',
+        ),
+    ]
@@ -0,0 +1,26 @@
+"""
+Index operations shared by migrations. Not a migration itself: the loader skips modules
+starting with '_'.
+"""
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations import AddIndex
+
+
+class AddIndexOnLargeTable(AddIndexConcurrently):
+    """
+    Build an index on a large table (answers, responses) without blocking writes to it:
+    CREATE INDEX CONCURRENTLY on PostgreSQL, a plain CREATE INDEX on other databases.
+    Migrations using it must set atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,43 @@
+"""
+Tally rebuild shared by data migrations. Works on historical models only, so it keeps
+matching the schema of the migrations that use it (the app's tallies module follows the
+current models). Not a migration itself: the loader skips modules starting with '_'.
+"""
+from collections import Counter
+
+from django.db.models import Count
+
+
+def rebuild_tallies(apps, survey_ids):
+    """Recompute the OptionTally/QuestionTally rows of the given surveys from their answers, one row per option/question."""
+    Answer = apps.get_model('surveys', 'Answer')
+    Option = apps.get_model('surveys', 'Option')
+    OptionTally = apps.get_model('surveys', 'OptionTally')
+    QuestionTally = apps.get_model('surveys', 'QuestionTally')
+
+    for survey_id in survey_ids:
+        answers = Answer.objects.filter(question__survey_id=survey_id)
+        option_counts = Counter()
+        question_totals = Counter()
+        rows = answers.order_by().values('question_id', 'selected_option_id').annotate(count=Count('id'))
+        for row in rows:
+            if row['selected_option_id'] is not None:
+                option_counts[row['selected_option_id']] += row['count']
+            question_totals[row['question_id']] += row['count']
+        selections = answers.filter(selected_options__isnull=False).values_list('selected_options', flat=True)
+        for option_ids in selections.iterator(chunk_size=2000):
+            option_counts.update(option_ids)
+
+        # Checkbox answers may still list options that have since been deleted
+        option_ids = set(Option.objects.filter(question__survey_id=survey_id).values_list('id', flat=True))
+        OptionTally.objects.filter(survey_id=survey_id).delete()
+        QuestionTally.objects.filter(survey_id=survey_id).delete()
+        OptionTally.objects.bulk_create([
+            OptionTally(survey_id=survey_id, option_id=option_id, count=count)
+            for option_id, count in option_counts.items()
+            if option_id in option_ids
+        ])
+        QuestionTally.objects.bulk_create([
+            QuestionTally(survey_id=survey_id, question_id=question_id, count=count)
+            for question_id, count in question_totals.items()
+        ])
@@ -0,0 +1,41 @@
+"""
+Trigram index operations shared by migrations, PostgreSQL only. Not a migration itself:
+the loader skips modules starting with '_'.
+"""
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db.migrations import RunSQL
+
+
+class AddTrigramIndex(AddIndexConcurrently):
+    """
+    Build a trigram index without blocking writes to the (large) table. The indexes only
+    exist on PostgreSQL; elsewhere searches fall back to scanning, as before.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class EnableTrigrams(TrigramExtension):
+    """pg_trgm, on PostgreSQL only (TrigramExtension skips other databases going forwards but not backwards)."""
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class RunPostgresSQL(RunSQL):
+    """RunSQL on PostgreSQL only, for indexes on tables whose models this app doesn't own."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
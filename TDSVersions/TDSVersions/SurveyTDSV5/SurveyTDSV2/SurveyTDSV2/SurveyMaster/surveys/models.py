@@ -1,6 +1,19 @@
 from django.db import models
+from django.db.models.functions import Cast, Upper
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+def trigram_index(field, name, **kwargs):
+    """
+    GIN trigram index on UPPER(field::text), the expression PostgreSQL compares in a
+    `field__icontains` lookup, so admin and response searches use it instead of scanning
+    the table. Needs the pg_trgm extension; other databases skip it (see migration 0020).
+    """
+    expression = OpClass(Upper(Cast(field, output_field=models.TextField())), name='gin_trgm_ops')
+    return GinIndex(expression, name=name, **kwargs)
 
 
 class Survey(models.Model):
@@ -25,6 +38,30 @@ class Survey(models.Model):
     is_deleted = models.BooleanField(default=False)
     archived = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Dashboard sections: a creator's live surveys of one status, newest first (keyset pages)
+            models.Index(
+                fields=['creator', 'status', '-created_at', '-id'],
+                name='survey_creator_status_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Superuser dashboard sections: every creator's live surveys of one status, newest first
+            models.Index(
+                fields=['status', '-created_at', '-id'],
+                name='survey_live_status_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Public listings (several statuses at once): live surveys newest first, filtered by status
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='survey_live_recent_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Admin search by survey name
+            trigram_index('name', 'survey_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return f"Survey: {self.name} (Status: {self.status})"
 
@@ -42,19 +79,14 @@ class Survey(models.Model):
 
     def get_published_results(self):
         """Return results for published surveys."""
+        from .tallies import tally_survey
+
         results = {}
         if self.is_published():
-            for question in self.questions.filter(is_deleted=False):
-                options = question.options.filter(is_deleted=False)
-                total_responses = sum(option.answers.count() for option in options)
-                results[question.text] = [
-                    {
-                        'option': option.text,
-                        'count': option.answers.count(),
-                        'percentage': round((option.answers.count() / total_responses) * 100, 2) if total_responses > 0 else 0,
-                    }
-                    for option in options
-                ]
+            tally = tally_survey(self)
+            questions = self.questions.filter(is_deleted=False).prefetch_related(live_options())
+            for question in questions:
+                results[question.text] = tally.option_stats(question.options.all())
         return results
 
     def get_aggregated_results(self):
@@ -63,23 +95,15 @@ class Survey(models.Model):
         Each question will display its options and the count of responses,
         sorted in descending order by the number of responses.
         """
+        from .tallies import tally_survey
+
         if not self.is_republished():
             return {}
-        
+
+        tally = tally_survey(self)
         results = {}
-        for question in self.questions.all():
-            options = question.options.all()
-            total_responses = sum(option.answers.count() for option in options)
-            option_stats = [
-                {
-                    'option': option.text,
-                    'count': option.answers.count(),
-                    'percentage': round((option.answers.count() / total_responses) * 100, 2) if total_responses > 0 else 0,
-                }
-                for option in options
-            ]
-            # Sort options by the number of responses in descending order
-            results[question.text] = sorted(option_stats, key=lambda x: x['count'], reverse=True)
+        for question in self.questions.prefetch_related(live_options()):
+            results[question.text] = tally.option_stats(question.options.all(), sort_by_count=True)
         return results
 
     def get_survey_status(self):
@@ -113,6 +137,14 @@ class Survey(models.Model):
         self.save()
 
 
+def touch_survey(*survey_ids):
+    """
+    Bump the updated_at of the given surveys, the version their cached definitions are keyed on,
+    in one UPDATE. Called once by each path that edits questions or options.
+    """
+    Survey.objects.filter(id__in=survey_ids).update(updated_at=timezone.now())
+
+
 class Question(models.Model):
     survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="questions")
     text = models.TextField()
@@ -127,6 +159,16 @@ class Question(models.Model):
 
     class Meta:
         ordering = ['position']
+        indexes = [
+            # Live questions of a survey in display order
+            models.Index(
+                fields=['survey', 'position'],
+                name='question_live_position_idx',
+                condition=models.Q(is_deleted=False),
+            ),
+            # Admin search by question text
+            trigram_index('text', 'question_text_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"Question: {self.text} (Survey: {self.survey.name})"
@@ -143,62 +185,58 @@ class Question(models.Model):
         self.is_deleted = True
         self.options.update(is_deleted=True)
         self.save()
+        touch_survey(self.survey_id)
 
     def restore(self):
         """Restore a soft-deleted question and its associated options."""
         self.is_deleted = False
         self.options.update(is_deleted=False)
         self.save()
+        touch_survey(self.survey_id)
 
-    def get_option_counts(self):
+    def get_option_counts(self, tally=None):
         """Show the count of responses for each option."""
-        options = self.options.all()
-        return [(option.text, option.answers.count()) for option in options]
+        from .tallies import tally_question
 
-    def get_response_percentage(self, sort_by_count=True):
+        tally = tally or tally_question(self)
+        return [(option.text, tally.count(option)) for option in self.options.all()]
+
+    def get_response_percentage(self, sort_by_count=True, tally=None):
         """
         Calculate the percentage of responses for each option.
         If `sort_by_count` is True, sort the results by the count in descending order.
+        Pass a survey-wide `tally` to avoid querying the answers again.
         """
-        total_responses = Answer.objects.filter(question=self).count()
+        from .tallies import tally_question
+
+        tally = tally or tally_question(self)
+        total_responses = tally.total(self)
         if total_responses == 0:
             return {}
 
         percentages = {}
-        for option in self.options.all():
-            response_count = option.answers.count()
-            percentage = (response_count / total_responses) * 100
-            percentages[option.text] = {
-                'count': response_count,
-                'percentage': round(percentage, 2)
+        for stats in tally.option_stats(self.options.all(), total=total_responses, sort_by_count=sort_by_count):
+            percentages[stats['option']] = {
+                'count': stats['count'],
+                'percentage': stats['percentage'],
             }
-
-        if sort_by_count:
-            return dict(sorted(percentages.items(), key=lambda item: item[1]['count'], reverse=True))
-
         return percentages
 
-    def get_aggregated_data(self):
+    def get_aggregated_data(self, tally=None):
         """
         Return aggregated data for the question.
         Each option includes its text, count of responses, and response percentage.
+        Pass a survey-wide `tally` to avoid querying the answers again.
         """
-        total_responses = Answer.objects.filter(question=self).count()
+        from .tallies import tally_question
+
+        tally = tally or tally_question(self)
+        total_responses = tally.total(self)
         if total_responses == 0:
             return []
 
-        aggregated_data = []
-        for option in self.options.all():
-            response_count = option.answers.count()
-            percentage = (response_count / total_responses * 100) if total_responses > 0 else 0
-            aggregated_data.append({
-                'option': option.text,
-                'count': response_count,
-                'percentage': round(percentage, 2),
-            })
-
         # Sort by count in descending order
-        return sorted(aggregated_data, key=lambda x: x['count'], reverse=True)
+        return tally.option_stats(self.options.all(), total=total_responses, sort_by_count=True)
 
     def has_valid_options(self):
         """Check if the question has at least one valid option."""
@@ -217,6 +255,12 @@ class Option(models.Model):
 
     class Meta:
         ordering = ['position']
+        indexes = [
+            # A question's options in display order; also finds its last position without an aggregate
+            models.Index(fields=['question', 'position'], name='option_question_position_idx'),
+            # Admin search by option text
+            trigram_index('text', 'option_text_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"Option: {self.text} (Question: {self.question.text})"
@@ -225,7 +269,9 @@ class Option(models.Model):
         """Ensure options have valid data."""
         if not self.text.strip():
             raise ValidationError("Option text cannot be empty.")
-        if self.question.options.filter(text__iexact=self.text).exclude(id=self.id).exists():
+        # Soft-deleted options no longer hold on to their text
+        live_options = self.question.options.filter(is_deleted=False)
+        if live_options.filter(text__iexact=self.text).exclude(id=self.id).exists():
             raise ValidationError(f"Duplicate option text: '{self.text}' is already used in this question.")
         if self.position <= 0:
             raise ValidationError("Position must be a positive integer.")
@@ -233,20 +279,35 @@ class Option(models.Model):
     def save(self, *args, **kwargs):
         """Ensure options are assigned a valid position if not provided."""
         if not self.position or self.position <= 0:
-            max_position = self.question.options.aggregate(models.Max('position'))['position__max'] or 0
-            self.position = max_position + 1
+            from .ordering import next_option_position
+
+            self.position = next_option_position(self.question_id)
         super().save(*args, **kwargs)
 
-    def get_response_count(self):
-        """Get the total number of responses for this option."""
-        return self.answers.count()
+    def get_response_count(self, tally=None):
+        """
+        Get the total number of responses for this option, checkbox answers included.
+        Pass a survey-wide `tally` to avoid querying the tallies again.
+        """
+        from .tallies import tally_question
+
+        tally = tally or tally_question(self.question)
+        return tally.count(self)
 
-    def get_response_percentage(self):
+    def get_response_percentage(self, tally=None):
         """Calculate the percentage of responses for this option within its question."""
-        total_responses = Answer.objects.filter(question=self.question).count()
+        from .tallies import tally_question
+
+        tally = tally or tally_question(self.question)
+        total_responses = tally.total(self.question)
         if total_responses == 0:
             return 0
-        return round((self.get_response_count() / total_responses) * 100, 2)
+        return round((tally.count(self) / total_responses) * 100, 2)
+
+
+def live_options():
+    """Prefetch of a question's options that leaves out the soft-deleted ones."""
+    return models.Prefetch('options', queryset=Option.objects.filter(is_deleted=False))
 
 
 class Response(models.Model):
@@ -254,6 +315,22 @@ class Response(models.Model):
     taker = models.ForeignKey(User, on_delete=models.CASCADE, related_name="responses")
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One response per taker and survey; its index also serves "has this taker answered?" lookups
+            models.UniqueConstraint(
+                fields=['survey', 'taker'],
+                name='response_unique_survey_taker',
+                violation_error_message="A user can only submit one response per survey.",
+            ),
+        ]
+        indexes = [
+            # Keyset pagination of a survey's responses: (submitted_at, id), newest first
+            models.Index(fields=['survey', '-submitted_at', '-id'], name='response_survey_recent_idx'),
+            # Admin date hierarchy: responses by submission date across all surveys
+            models.Index(fields=['submitted_at'], name='response_submitted_at_idx'),
+        ]
+
     def __str__(self):
         return f"Response: {self.taker.username} for Survey: {self.survey.name}"
 
@@ -261,21 +338,22 @@ class Response(models.Model):
         """Ensure responses are valid and follow survey rules."""
         if self.survey.status not in [Survey.PUBLISHED, Survey.REPUBLISHED]:
             raise ValidationError("Responses can only be submitted for published or republished surveys.")
-        if Response.objects.filter(survey=self.survey, taker=self.taker).exclude(id=self.id).exists():
-            raise ValidationError("A user can only submit one response per survey.")
+        # One response per survey is enforced by the response_unique_survey_taker constraint
 
     def get_answers_summary(self):
         """
         Return a summary of answers for this response.
         Includes the question text and the corresponding answers (text or selected option).
         """
-        answers = self.answers.all()
+        answers = self.answers.select_related('question', 'selected_option')
         summary = []
         for answer in answers:
             if answer.text:
                 summary.append({'question': answer.question.text, 'answer': answer.text})
             elif answer.selected_option:
                 summary.append({'question': answer.question.text, 'answer': answer.selected_option.text})
+            elif answer.selected_options:
+                summary.append({'question': answer.question.text, 'answer': answer.get_display_answer()})
         return summary
 
     def get_survey_status(self):
@@ -288,27 +366,46 @@ class Answer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     text = models.TextField(blank=True, null=True)
     selected_option = models.ForeignKey(Option, on_delete=models.CASCADE, blank=True, null=True, related_name="answers")
+    # Checkbox answers: every selected option id in one row instead of one row per option
+    selected_options = models.JSONField(blank=True, null=True)
 
     class Meta:
         unique_together = ('response', 'question')
+        indexes = [
+            # Grouped tally rebuilds: answers per question and selected option
+            models.Index(fields=['question', 'selected_option'], name='answer_question_option_idx'),
+            # Response and admin search in free-text answers; option answers have no text
+            trigram_index('text', 'answer_text_trgm_idx', condition=models.Q(text__isnull=False)),
+        ]
 
     def __str__(self):
         question_type = self.question.question_type
-        answer = self.text or self.selected_option.text if self.selected_option else "No answer"
+        answer = self.text or self.get_display_answer()
         return f"Answer: {answer} (Question: {self.question.text}, Type: {question_type})"
 
     def clean(self):
         """Ensure only one type of answer is provided and it matches the question type."""
-        if self.text and self.selected_option:
+        provided = [bool(self.text), bool(self.selected_option_id), bool(self.selected_options)]
+        if sum(provided) > 1:
             raise ValidationError("Cannot provide both text and selected option as an answer.")
-        if not self.text and not self.selected_option:
+        if not any(provided):
             raise ValidationError("An answer must be provided.")
 
         # Validate answer based on the question type
         if self.question.question_type == 'text' and not self.text:
             raise ValidationError("This question requires a text answer.")
-        if self.question.question_type in ['radio', 'checkbox'] and not self.selected_option:
+        if self.question.question_type == 'radio' and not self.selected_option_id:
             raise ValidationError("This question requires a selected option.")
+        if self.question.question_type == 'checkbox' and not self.selected_options:
+            raise ValidationError("This question requires at least one selected option.")
+
+    def get_selected_option_ids(self):
+        """Return the ids of every option chosen in this answer (radio or checkbox)."""
+        if self.selected_options:
+            return list(self.selected_options)
+        if self.selected_option_id:
+            return [self.selected_option_id]
+        return []
 
     def get_display_answer(self):
         """
@@ -319,4 +416,61 @@ class Answer(models.Model):
             return self.text
         if self.selected_option:
             return self.selected_option.text
+        if self.selected_options:
+            options = Option.objects.in_bulk(self.selected_options)
+            return ", ".join(options[option_id].text for option_id in self.selected_options if option_id in options)
         return "No answer provided"
+
+
+class OptionTally(models.Model):
+    """
+    Denormalized count of answers for an option.
+    Incremented inside the submission transaction so results pages can read
+    precomputed counts instead of scanning the Answer table. Each option may
+    have several shard rows (see SURVEY_TALLY_SHARDS); its count is their sum.
+    """
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="option_tallies")
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name="tallies")
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('option', 'shard')
+
+    def __str__(self):
+        return f"OptionTally: {self.option_id}[{self.shard}] = {self.count}"
+
+
+class QuestionTally(models.Model):
+    """Denormalized count of answers (text or option) given to a question, sharded like OptionTally."""
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="question_tallies")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="tallies")
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('question', 'shard')
+
+    def __str__(self):
+        return f"QuestionTally: {self.question_id}[{self.shard}] = {self.count}"
+
+
+class ResultsSnapshot(models.Model):
+    """
+    Final results of a closed survey, computed once when it is closed.
+    A closed survey can no longer receive answers, so the stored results
+    are served as-is instead of being aggregated on every visit.
+    """
+    survey = models.OneToOneField(Survey, on_delete=models.CASCADE, related_name="results_snapshot")
+    results = models.JSONField(default=list)
+    total_responses = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Results snapshot for Survey: {self.survey_id} ({self.created_at:%Y-%m-%d %H:%M})"
+
+    def save(self, *args, **kwargs):
+        """Snapshots are immutable once written."""
+        if self.pk:
+            raise ValidationError("Results snapshots cannot be modified.")
+        super().save(*args, **kwargs)
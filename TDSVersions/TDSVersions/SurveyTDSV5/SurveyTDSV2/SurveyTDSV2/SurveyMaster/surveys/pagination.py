@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, newest first."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(value, pk):
+    """Encode the (timestamp, id) position of the last row of a page as an opaque URL-safe token."""
+    raw = json.dumps([value.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back to (timestamp, id); a missing or tampered cursor gives None (the first page)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+def paginate(queryset, cursor=None, field='created_at', page_size=None):
+    """
+    Return the page of `queryset` after `cursor`, ordered by (field, id) descending.
+    Seeks past the cursor with a WHERE clause instead of an OFFSET, so every page
+    costs the same as the first one.
+    """
+    page_size = page_size or settings.SURVEY_PAGE_SIZE
+    queryset = queryset.order_by(f'-{field}', '-id')
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, pk = position
+        queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+
+    # Fetch one extra row to know whether there is a next page
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.id)
+    return KeysetPage(items, next_cursor)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists of very large tables. An unfiltered changelist on
+    PostgreSQL takes its row count from the planner's estimate (pg_class.reltuples)
+    instead of running COUNT(*) over the whole table; filtered changelists, other
+    databases and tables smaller than `estimate_above` rows are counted exactly.
+    """
+    estimate_above = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.estimate_above:
+                return row[0]
+        return super().count
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .caching import bump_listings_generation
+from .models import Survey
+
+
+@receiver([post_save, post_delete], sender=Survey)
+def survey_changed(sender, instance, **kwargs):
+    # Any saved change (status, deletion, name, including admin edits) may show in the public
+    # listings; invalidate them once the change is committed, so no request re-caches the old rows
+    transaction.on_commit(bump_listings_generation)
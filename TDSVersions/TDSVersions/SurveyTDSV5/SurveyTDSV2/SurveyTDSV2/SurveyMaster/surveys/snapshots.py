@@ -0,0 +1,50 @@
+from django.db import IntegrityError, transaction
+from .models import ResultsSnapshot, live_options
+from .tallies import rebuild_survey_tallies
+
+
+def build_results(survey, tally):
+    """
+    Compute the final results of a survey from `tally` in the shape used by view_results:
+    a list of {'text', 'options': [{'text', 'count', 'percentage'}]} dicts.
+    """
+    results = []
+    for question in survey.questions.filter(is_deleted=False).prefetch_related(live_options()):
+        results.append({
+            'text': question.text,
+            'options': [
+                {
+                    'text': stats['option'],
+                    'count': stats['count'],
+                    'percentage': stats['percentage'],
+                }
+                for stats in tally.option_stats(question.options.all())
+            ],
+        })
+    return results
+
+
+def freeze_results(survey):
+    """
+    Store the survey's final results once and return the snapshot (existing snapshots are kept).
+    The results are counted from the answers, not read from the tallies, so tally drift (or tallies
+    never backfilled) can't be frozen; the survey's tallies are rebuilt from the same count.
+    """
+    try:
+        return survey.results_snapshot
+    except ResultsSnapshot.DoesNotExist:
+        pass
+
+    try:
+        with transaction.atomic():
+            tally = rebuild_survey_tallies(survey)
+            snapshot = ResultsSnapshot.objects.create(
+                survey=survey,
+                results=build_results(survey, tally),
+                total_responses=survey.get_total_responses(),
+            )
+    except IntegrityError:
+        # Another request froze the results first
+        snapshot = ResultsSnapshot.objects.get(survey=survey)
+    survey.results_snapshot = snapshot
+    return snapshot
@@ -0,0 +1,42 @@
+// "Load more" buttons fetch the next page as an HTML fragment and append it in place.
+// Each <template data-target="..."> in the fragment is appended to the element with that id;
+// the fragment's own "Load more" button (if any) replaces the one that was clicked.
+document.addEventListener("click", async (event) => {
+    const button = event.target.closest(".load-more");
+    if (!button) {
+        return;
+    }
+    event.preventDefault();
+    if (button.classList.contains("loading")) {
+        return;
+    }
+    button.classList.add("loading");
+
+    const response = await fetch(button.dataset.fragmentUrl, {
+        headers: {"X-Requested-With": "XMLHttpRequest"},
+    });
+    if (!response.ok || response.redirected) {
+        // Fall back to the full page for this cursor
+        window.location.href = button.href;
+        return;
+    }
+
+    const fragment = document.createElement("template");
+    fragment.innerHTML = await response.text();
+    fragment.content.querySelectorAll("template[data-target]").forEach((part) => {
+        const target = document.getElementById(part.dataset.target);
+        if (!target || !part.content.children.length) {
+            return;
+        }
+        target.querySelectorAll(".empty-row").forEach((row) => row.remove());
+        target.closest(".paged-section")?.removeAttribute("hidden");
+        target.append(part.content);
+    });
+
+    const next = fragment.content.querySelector(".load-more");
+    if (next) {
+        button.replaceWith(next);
+    } else {
+        button.remove();
+    }
+});
@@ -0,0 +1,140 @@
+import logging
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from .models import Answer, Question, Response, live_options
+from .tallies import record_answers
+
+logger = logging.getLogger(__name__)
+
+OPTION_QUESTION_TYPES = ('radio', 'checkbox')
+
+# Compiled, immutable view of a survey's questions and options, cached per survey version.
+# Submissions validate against it and the take-survey pages and TakeSurveyForm render from it.
+# Named tuples have no per-instance __dict__, which keeps it small in the cache and cheap to read.
+CompiledOption = namedtuple('CompiledOption', ['id', 'text', 'position'])
+CompiledQuestion = namedtuple('CompiledQuestion', ['id', 'text', 'question_type', 'position', 'options', 'option_ids'])
+CompiledSurvey = namedtuple('CompiledSurvey', ['id', 'version', 'questions'])
+
+
+class SubmissionError(Exception):
+    """Raised when posted answers don't match the survey they were submitted to."""
+
+
+def survey_version(survey):
+    """Version of a survey's structure; changes whenever the survey is saved."""
+    return survey.updated_at.isoformat()
+
+
+def schema_cache_key(survey):
+    return f"surveys:schema:{survey.id}:{survey_version(survey)}"
+
+
+def compile_survey(survey):
+    """
+    Return the CompiledSurvey for a survey, loading its questions and options
+    (two queries) only when this version of the survey isn't cached yet.
+    """
+    key = schema_cache_key(survey)
+    schema = cache.get(key)
+    if schema is not None:
+        return schema
+
+    questions = (
+        Question.objects.filter(survey=survey, is_deleted=False)
+        .prefetch_related(live_options())
+        .order_by('position', 'id')
+    )
+    compiled_questions = []
+    for question in questions:
+        options = tuple(
+            CompiledOption(option.id, option.text, option.position)
+            for option in question.options.all()
+        )
+        compiled_questions.append(CompiledQuestion(
+            question.id,
+            question.text,
+            question.question_type,
+            question.position,
+            options,
+            {str(option.id): option.id for option in options},
+        ))
+
+    schema = CompiledSurvey(survey.id, survey_version(survey), tuple(compiled_questions))
+    # Keyed on the version, so an entry never goes stale; let unused versions age out
+    cache.set(key, schema, 60 * 60 * 24)
+    return schema
+
+
+def parse_answers(schema, data):
+    """
+    Validate posted data (field "question_<id>") against a compiled survey, in memory.
+    Returns a list of (question_id, text, option_id, option_ids) tuples ready to be saved;
+    checkbox questions produce one tuple carrying every selected option id.
+    """
+    answers = []
+    for question in schema.questions:
+        field = f"question_{question.id}"
+        if question.question_type == 'text':
+            answer_text = data.get(field, "").strip()
+            if answer_text:
+                answers.append((question.id, answer_text, None, None))
+
+        elif question.question_type in OPTION_QUESTION_TYPES:
+            selected_option_ids = data.getlist(field)
+            if question.question_type == 'radio' and len(selected_option_ids) > 1:
+                raise SubmissionError(f"Question '{question.text}' accepts a single answer.")
+            option_ids = []
+            for option_id in selected_option_ids:
+                if option_id not in question.option_ids:
+                    raise SubmissionError(f"Invalid option selected for question '{question.text}'.")
+                if question.option_ids[option_id] not in option_ids:
+                    option_ids.append(question.option_ids[option_id])
+
+            if not option_ids:
+                continue
+            if question.question_type == 'radio':
+                answers.append((question.id, None, option_ids[0], None))
+            else:
+                answers.append((question.id, None, None, sorted(option_ids)))
+
+    return answers
+
+
+def save_answers(survey, taker, answers):
+    """
+    Create the response, its answers (one bulk insert) and the tally increments in one transaction.
+    A second response by the same taker is rejected by the (survey, taker) unique constraint;
+    any other integrity error is a bug or a race on the survey's structure and propagates.
+    """
+    with transaction.atomic():
+        try:
+            # Savepoint, so the transaction is still usable to check what the insert ran into
+            with transaction.atomic():
+                response = Response.objects.create(survey=survey, taker=taker)
+        except IntegrityError:
+            if Response.objects.filter(survey=survey, taker=taker).exists():
+                raise SubmissionError("You have already responded to this survey.")
+            raise
+
+        rows = [
+            Answer(
+                response=response,
+                question_id=question_id,
+                text=text,
+                selected_option_id=option_id,
+                selected_options=option_ids,
+            )
+            for question_id, text, option_id, option_ids in answers
+        ]
+        Answer.objects.bulk_create(rows)
+        record_answers(survey, rows)
+    logger.debug(f"Saved response {response.id} with {len(rows)} answers for survey {survey.id}")
+    return response
+
+
+def submit_response(survey, taker, data):
+    """Compile the survey, validate the posted answers against it and persist them."""
+    schema = compile_survey(survey)
+    return save_answers(survey, taker, parse_answers(schema, data))
@@ -0,0 +1,164 @@
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import Answer, Option, OptionTally, QuestionTally
+
+
+class SurveyTally:
+    """
+    Answer counts for a survey, keyed by option id and question id.
+    Results pages read these from the OptionTally/QuestionTally tables, so they
+    cost the same number of queries no matter how many answers, questions or
+    options a survey has.
+    """
+
+    def __init__(self, option_counts=None, question_totals=None):
+        self.option_counts = option_counts or {}
+        self.question_totals = question_totals or {}
+
+    @classmethod
+    def from_answers(cls, answers):
+        """
+        Build a tally from the given Answer queryset.
+        Single-option answers are grouped by question and selected option in the
+        database; checkbox answers store their option ids together, so those
+        lists are streamed in chunks and decoded in bulk.
+        """
+        rows = (
+            answers.order_by()
+            .values('question_id', 'selected_option_id')
+            .annotate(count=Count('id'))
+        )
+        option_counts = Counter()
+        question_totals = Counter()
+        for row in rows:
+            if row['selected_option_id'] is not None:
+                option_counts[row['selected_option_id']] += row['count']
+            question_totals[row['question_id']] += row['count']
+
+        selections = answers.filter(selected_options__isnull=False).values_list('selected_options', flat=True)
+        for option_ids in selections.iterator(chunk_size=2000):
+            option_counts.update(option_ids)
+        return cls(dict(option_counts), dict(question_totals))
+
+    def count(self, option):
+        """Return the number of answers that selected this option."""
+        return self.option_counts.get(option.id, 0)
+
+    def total(self, question):
+        """Return the number of answers (text or option) given to this question; a checkbox answer counts once."""
+        return self.question_totals.get(question.id, 0)
+
+    def option_stats(self, options, total=None, sort_by_count=False):
+        """
+        Return a list of {'option', 'count', 'percentage'} dicts for the given options.
+        When `total` is not provided, percentages are relative to the sum of the option counts.
+        """
+        counts = [(option, self.count(option)) for option in options]
+        if total is None:
+            total = sum(count for _, count in counts)
+
+        stats = [
+            {
+                'option': option.text,
+                'count': count,
+                'percentage': round((count / total) * 100, 2) if total > 0 else 0,
+            }
+            for option, count in counts
+        ]
+        if sort_by_count:
+            stats.sort(key=lambda x: x['count'], reverse=True)
+        return stats
+
+
+def _summed(tallies, key):
+    """Sum the shard rows of each option or question into a {id: count} dict."""
+    return dict(tallies.order_by().values(key).annotate(total=Sum('count')).values_list(key, 'total'))
+
+
+def tallied_count(model, key):
+    """
+    Annotation summing the shard rows of each row's tally (0 when it has none), e.g.
+    Option.objects.annotate(answer_count=tallied_count(OptionTally, 'option')).
+    """
+    tallies = model.objects.filter(**{key: OuterRef('pk')}).order_by().values(key)
+    return Coalesce(Subquery(tallies.annotate(total=Sum('count')).values('total')), 0)
+
+
+def tally_survey(survey):
+    """Return a SurveyTally with every precomputed option and question count for the survey."""
+    return SurveyTally(
+        _summed(OptionTally.objects.filter(survey=survey), 'option_id'),
+        _summed(QuestionTally.objects.filter(survey=survey), 'question_id'),
+    )
+
+
+def tally_question(question):
+    """Return a SurveyTally limited to a single question."""
+    return SurveyTally(
+        _summed(OptionTally.objects.filter(option__question=question), 'option_id'),
+        _summed(QuestionTally.objects.filter(question=question), 'question_id'),
+    )
+
+
+def tally_shard_count():
+    """Number of counter rows kept per option and question (1 disables sharding)."""
+    return max(1, getattr(settings, 'SURVEY_TALLY_SHARDS', 1))
+
+
+def _increment(model, key, survey, increments, shard):
+    """Create any missing tally rows in the shard, then add every increment with a single UPDATE."""
+    if not increments:
+        return
+    model.objects.bulk_create(
+        [model(survey=survey, shard=shard, **{key: pk}) for pk in increments],
+        ignore_conflicts=True,
+    )
+    model.objects.filter(shard=shard, **{f'{key}__in': list(increments)}).update(
+        count=F('count') + Case(
+            *[When(**{key: pk}, then=Value(amount)) for pk, amount in increments.items()],
+            default=Value(0),
+        )
+    )
+
+
+def record_answers(survey, answers):
+    """
+    Add newly saved answers to the survey's tallies.
+    Must be called inside the same transaction that saved the answers.
+    Each submission writes to one randomly chosen shard, so concurrent takers
+    of a popular survey rarely wait on the same counter rows.
+    """
+    shard = random.randrange(tally_shard_count())
+    option_increments = Counter(
+        option_id for answer in answers for option_id in answer.get_selected_option_ids()
+    )
+    question_increments = Counter(answer.question_id for answer in answers)
+    _increment(OptionTally, 'option_id', survey, option_increments, shard)
+    _increment(QuestionTally, 'question_id', survey, question_increments, shard)
+
+
+def rebuild_survey_tallies(survey):
+    """Recompute a survey's tallies from its Answer rows, replacing every shard with a single row."""
+    with transaction.atomic():
+        tally = SurveyTally.from_answers(Answer.objects.filter(question__survey=survey))
+        # Checkbox answers may still list options that have since been deleted
+        option_ids = set(Option.objects.filter(question__survey=survey).values_list('id', flat=True))
+        tally.option_counts = {
+            option_id: count for option_id, count in tally.option_counts.items() if option_id in option_ids
+        }
+        OptionTally.objects.filter(survey=survey).delete()
+        QuestionTally.objects.filter(survey=survey).delete()
+        OptionTally.objects.bulk_create([
+            OptionTally(survey=survey, option_id=option_id, count=count)
+            for option_id, count in tally.option_counts.items()
+        ])
+        QuestionTally.objects.bulk_create([
+            QuestionTally(survey=survey, question_id=question_id, count=count)
+            for question_id, count in tally.question_totals.items()
+        ])
+    return tally
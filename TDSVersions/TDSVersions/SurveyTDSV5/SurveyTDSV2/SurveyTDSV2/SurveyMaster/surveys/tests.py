@@ -1,3 +1,861 @@
-from django.test import TestCase
+import csv
+import io
 
-# Create your tests here.
+from unittest import mock, skipUnless
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import caching
+from .authoring import apply_survey_edit, parse_questions
+from .caching import get_listing_page
+from .exports import PARQUET_AVAILABLE
+from .migrations._tallies import rebuild_tallies
+from .models import Survey, Question, Option, Response, Answer, OptionTally
+from .pagination import decode_cursor, paginate
+from .snapshots import freeze_results
+from .submission import SubmissionError, compile_survey, save_answers, submit_response
+from .tallies import rebuild_survey_tallies, record_answers, tally_survey
+from .validation import check_structure, validate_survey
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrate the surveys app back to `migrate_from`, let the test add rows, then migrate forward."""
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate([('surveys', self.migrate_from)])
+        self.apps = self.executor.loader.project_state([('surveys', self.migrate_from)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('surveys', target)])
+        return executor.loader.project_state([('surveys', target)]).apps
+
+
+class ResultsPageQueryTests(TestCase):
+    """The creator results pages take their counts from the cached tally, in the same queries for any survey size."""
+
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user('creator', is_staff=True)
+        self.survey = Survey.objects.create(creator=self.creator, name='Results', status=Survey.PUBLISHED)
+        answers = [(question.id, None, yes.id, None) for question, yes in self.add_questions(1, 3)]
+        save_answers(self.survey, User.objects.create_user('taker'), answers)
+        self.client.force_login(self.creator)
+
+    def add_questions(self, first, last):
+        questions = []
+        for position in range(first, last + 1):
+            question = Question.objects.create(
+                survey=self.survey, text=f'Q{position}', question_type='radio', position=position
+            )
+            yes = Option.objects.create(question=question, text=f'Q{position} yes', position=1)
+            Option.objects.create(question=question, text=f'Q{position} no', position=2)
+            questions.append((question, yes))
+        return questions
+
+    def assertResultsQueries(self, url_name, expected):
+        with self.assertNumQueries(expected):
+            response = self.client.get(reverse(url_name, args=[self.survey.id]))
+        self.assertContains(response, '100.0%', count=3)
+        return response
+
+    def test_survey_results(self):
+        # Survey, its option and question tallies (cold results cache), questions, options
+        self.assertResultsQueries('survey_results', 5)
+        # The tallies now come from the results cache
+        self.assertResultsQueries('survey_results', 3)
+        self.add_questions(4, 10)
+        cache.clear()
+        self.assertContains(self.assertResultsQueries('survey_results', 5), 'Q10 no')
+
+    def test_aggregated_results(self):
+        Survey.objects.filter(id=self.survey.id).update(status=Survey.REPUBLISHED)
+        caching.get_results_tally(self.survey)
+        # Session, user, survey, its creator (for the access check), questions, options
+        self.assertResultsQueries('aggregated_results', 6)
+        self.add_questions(4, 10)
+        self.assertContains(self.assertResultsQueries('aggregated_results', 6), 'Q10 no')
+
+
+class TallyBackfillMigrationTests(MigrationTestCase):
+    migrate_from = '0020_search_trigram_indexes'
+
+    def test_backfills_surveys_without_tallies(self):
+        Survey = self.apps.get_model('surveys', 'Survey')
+        Question = self.apps.get_model('surveys', 'Question')
+        Option = self.apps.get_model('surveys', 'Option')
+        Response = self.apps.get_model('surveys', 'Response')
+        Answer = self.apps.get_model('surveys', 'Answer')
+        creator = self.apps.get_model('auth', 'User').objects.create(username='creator')
+        survey = Survey.objects.create(creator=creator, name='Old', status='published')
+        radio = Question.objects.create(survey=survey, text='Pick one', question_type='radio', position=1)
+        checkbox = Question.objects.create(survey=survey, text='Pick any', question_type='checkbox', position=2)
+        yes = Option.objects.create(question=radio, text='Yes', position=1)
+        red = Option.objects.create(question=checkbox, text='Red', position=1)
+        blue = Option.objects.create(question=checkbox, text='Blue', position=2)
+        for number, username in enumerate(('alice', 'bob')):
+            taker = self.apps.get_model('auth', 'User').objects.create(username=username)
+            response = Response.objects.create(survey=survey, taker=taker)
+            Answer.objects.create(response=response, question=radio, selected_option=yes)
+            Answer.objects.create(response=response, question=checkbox, selected_options=[red.id, blue.id][:number + 1])
+
+        apps = self.migrate('0021_backfill_tallies')
+        OptionTally = apps.get_model('surveys', 'OptionTally')
+        QuestionTally = apps.get_model('surveys', 'QuestionTally')
+        self.assertEqual(
+            dict(OptionTally.objects.values_list('option_id', 'count')), {yes.id: 2, red.id: 2, blue.id: 1}
+        )
+        self.assertEqual(dict(QuestionTally.objects.values_list('question_id', 'count')), {radio.id: 2, checkbox.id: 2})
+
+
+@override_settings(SURVEY_TALLY_SHARDS=4)
+class TallyShardTests(TestCase):
+    def setUp(self):
+        self.survey = Survey.objects.create(creator=User.objects.create_user('creator'), name='Sharded')
+        self.question = Question.objects.create(survey=self.survey, text='Pick one', question_type='radio', position=1)
+        self.yes = Option.objects.create(question=self.question, text='Yes', position=1)
+
+    def test_increments_spread_over_shards_and_rebuild_merges_them(self):
+        for number in range(6):
+            with mock.patch('surveys.tallies.random.randrange', return_value=number % 3):
+                save_answers(self.survey, User.objects.create_user(f'taker{number}'), [(self.question.id, None, self.yes.id, None)])
+        self.assertEqual(sorted(OptionTally.objects.values_list('shard', 'count')), [(0, 2), (1, 2), (2, 2)])
+        self.assertEqual((tally_survey(self.survey).count(self.yes), tally_survey(self.survey).total(self.question)), (6, 6))
+
+        rebuild_survey_tallies(self.survey)
+        self.assertEqual(list(OptionTally.objects.values_list('option_id', 'count')), [(self.yes.id, 6)])
+        self.assertEqual(tally_survey(self.survey).total(self.question), 6)
+
+    def test_increment_creates_missing_rows_in_one_shard(self):
+        answers = [Answer(question=self.question, selected_option=self.yes)] * 2
+        with mock.patch('surveys.tallies.random.randrange', return_value=3):
+            record_answers(self.survey, answers)
+        self.assertEqual(list(OptionTally.objects.values_list('shard', 'count')), [(3, 2)])
+
+
+class FreezeResultsTests(TestCase):
+    def test_snapshot_counts_answers_not_tallies(self):
+        taker = User.objects.create_user('taker')
+        survey = Survey.objects.create(creator=taker, name='Closing', status=Survey.PUBLISHED)
+        question = Question.objects.create(survey=survey, text='Pick one', question_type='radio', position=1)
+        yes = Option.objects.create(question=question, text='Yes', position=1)
+        response = Response.objects.create(survey=survey, taker=taker)
+        Answer.objects.create(response=response, question=question, selected_option=yes)
+        # No tally rows: as if the survey was answered before the tallies existed
+        self.assertEqual(tally_survey(survey).count(yes), 0)
+
+        snapshot = freeze_results(survey)
+        self.assertEqual(snapshot.results[0]['options'][0]['count'], 1)
+        self.assertEqual(tally_survey(survey).count(yes), 1)
+
+
+class ResultsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        creator = User.objects.create_user('creator')
+        self.survey = Survey.objects.create(creator=creator, name='Cached', status=Survey.PUBLISHED)
+        self.key = caching.cache_key('results', self.survey.id)
+        self.builds = []
+        builder = lambda survey: self.builds.append(survey.id) or {'option_counts': {}, 'question_totals': {}}
+        patcher = mock.patch.dict(caching.BUILDERS, {'results': (builder, 'SURVEY_RESULTS_CACHE_SECONDS')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def expire(self):
+        entry = cache.get(self.key)
+        entry['fresh_until'] = 0
+        cache.set(self.key, entry)
+
+    def test_lock_holder_rebuilds_stale_entry_in_line(self):
+        caching.get_results_tally(self.survey)
+        self.expire()
+        caching.get_results_tally(self.survey)
+        self.assertEqual(len(self.builds), 2)
+        self.assertGreater(cache.get(self.key)['fresh_until'], 0)
+        self.assertIsNone(cache.get(self.key + ':lock'))
+
+    def test_others_serve_stale_entry_while_locked(self):
+        caching.get_results_tally(self.survey)
+        self.expire()
+        cache.add(self.key + ':lock', 1)
+        caching.get_results_tally(self.survey)
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(caching.get_cache_metrics(self.survey.id)['results'],
+                         {'hits': 0, 'misses': 1, 'stale': 1, 'rebuilds': 1})
+
+    def test_miss_while_locked_waits_for_the_entry(self):
+        cache.add(self.key + ':lock', 1)
+        entry = {'data': {'option_counts': {1: 3}, 'question_totals': {}}, 'fresh_until': 0}
+        # The lock holder stores its entry while this request polls
+        with mock.patch.object(caching.time, 'sleep', side_effect=lambda seconds: cache.set(self.key, entry)):
+            tally = caching.get_results_tally(self.survey)
+        self.assertEqual(tally.option_counts, {1: 3})
+        self.assertEqual(self.builds, [])
+
+    @override_settings(SURVEY_CACHE_WAIT_SECONDS=0.1)
+    def test_miss_while_locked_builds_without_storing_after_waiting(self):
+        cache.add(self.key + ':lock', 1)
+        with (
+            mock.patch.object(caching.time, 'sleep'),
+            mock.patch.object(caching.time, 'monotonic', side_effect=[0, 0.05, 0.2]),
+        ):
+            caching.get_results_tally(self.survey)
+        self.assertEqual(len(self.builds), 1)
+        self.assertIsNone(cache.get(self.key))
+
+
+class SubmitResponseTests(TestCase):
+    def setUp(self):
+        self.taker = User.objects.create_user('taker')
+        self.survey = Survey.objects.create(creator=self.taker, name='Submitted', status=Survey.PUBLISHED)
+        self.radio = Question.objects.create(survey=self.survey, text='Pick one', question_type='radio', position=1)
+        self.checkbox = Question.objects.create(survey=self.survey, text='Pick any', question_type='checkbox', position=2)
+        self.yes = Option.objects.create(question=self.radio, text='Yes', position=1)
+        self.no = Option.objects.create(question=self.radio, text='No', position=2)
+        self.red = Option.objects.create(question=self.checkbox, text='Red', position=1)
+        self.blue = Option.objects.create(question=self.checkbox, text='Blue', position=2)
+
+    def post(self, **fields):
+        """Form data selecting the given option ids, e.g. post(radio=[option_id])."""
+        return {
+            f'question_{getattr(self, question).id}': [str(option_id) for option_id in option_ids]
+            for question, option_ids in fields.items()
+        }
+
+    def submit(self, **fields):
+        data = QueryDict(mutable=True)
+        for name, values in self.post(**fields).items():
+            data.setlist(name, values)
+        return submit_response(self.survey, self.taker, data)
+
+    def test_rejects_option_of_another_question(self):
+        with self.assertRaisesMessage(SubmissionError, "Invalid option selected for question 'Pick one'."):
+            self.submit(radio=[self.red.id])
+        self.assertFalse(Response.objects.exists())
+
+    def test_rejects_several_radio_answers(self):
+        with self.assertRaisesMessage(SubmissionError, "Question 'Pick one' accepts a single answer."):
+            self.submit(radio=[self.yes.id, self.no.id])
+        self.assertFalse(Response.objects.exists())
+
+    def test_duplicate_submission_is_rejected(self):
+        self.client.force_login(self.taker)
+        url = reverse('take_survey', args=[self.survey.id])
+        self.client.post(url, self.post(radio=[self.yes.id]))
+        response = self.client.post(url, self.post(radio=[self.no.id]))
+        self.assertRedirects(response, url)
+        self.assertIn("You have already responded to this survey.",
+                      [str(message) for message in get_messages(response.wsgi_request)])
+        self.assertEqual(Answer.objects.get(question=self.radio).selected_option, self.yes)
+
+    def test_republished_checkbox_answer(self):
+        self.survey.status = Survey.REPUBLISHED
+        self.survey.save()
+        self.client.force_login(self.taker)
+        url = reverse('take_republished_survey', args=[self.survey.id])
+        self.client.post(url, self.post(radio=[self.yes.id], checkbox=[self.blue.id, self.red.id, self.blue.id]))
+        answer = Answer.objects.get(question=self.checkbox)
+        self.assertEqual((answer.selected_option, answer.selected_options), (None, [self.red.id, self.blue.id]))
+        tally = tally_survey(self.survey)
+        self.assertEqual((tally.count(self.red), tally.count(self.blue), tally.total(self.checkbox)), (1, 1, 1))
+
+
+class SurveyVersionTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_superuser('creator')
+        self.survey = Survey.objects.create(creator=self.creator, name='Versioned')
+        self.questions = [
+            Question.objects.create(survey=self.survey, text=f'Q{i}', question_type='radio', position=i)
+            for i in range(10)
+        ]
+        for question in self.questions:
+            Option.objects.bulk_create(Option(question=question, text=f'O{i}', position=i) for i in range(5))
+
+    def test_deleting_a_survey_does_not_touch_it_per_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.survey.delete()
+        self.assertLess(len(queries), 20)
+        self.assertFalse(Option.objects.exists())
+
+    def test_admin_delete_touches_the_survey_once(self):
+        version = self.survey.updated_at
+        admin_site = admin.site._registry[Option]
+        request = RequestFactory().post('/')
+        request.user = self.creator
+        with CaptureQueriesContext(connection) as queries:
+            admin_site.delete_queryset(request, Option.objects.filter(question__in=self.questions[:3]))
+        self.assertEqual(sum('UPDATE' in query['sql'] for query in queries), 1)
+        self.survey.refresh_from_db()
+        self.assertGreater(self.survey.updated_at, version)
+
+
+class CheckboxPackingMigrationTests(MigrationTestCase):
+    migrate_from = '0012_resultssnapshot'
+
+    def test_packs_and_unpacks_checkbox_answers(self):
+        User = self.apps.get_model('auth', 'User')
+        Survey = self.apps.get_model('surveys', 'Survey')
+        Question = self.apps.get_model('surveys', 'Question')
+        Option = self.apps.get_model('surveys', 'Option')
+        Response = self.apps.get_model('surveys', 'Response')
+        Answer = self.apps.get_model('surveys', 'Answer')
+        creator = User.objects.create(username='creator')
+        survey = Survey.objects.create(creator=creator, name='Colours', status='published')
+        radio = Question.objects.create(survey=survey, text='Pick one', question_type='radio', position=1)
+        checkbox = Question.objects.create(survey=survey, text='Pick any', question_type='checkbox', position=2)
+        yes = Option.objects.create(question=radio, text='Yes', position=1)
+        red = Option.objects.create(question=checkbox, text='Red', position=1)
+        blue = Option.objects.create(question=checkbox, text='Blue', position=2)
+        # Before 0013 a checkbox answer is one row with a single selected_option
+        for username, colour in (('alice', red), ('bob', blue)):
+            response = Response.objects.create(survey=survey, taker=User.objects.create(username=username))
+            Answer.objects.create(response=response, question=radio, selected_option=yes)
+            Answer.objects.create(response=response, question=checkbox, selected_option=colour)
+
+        apps = self.migrate('0013_answer_selected_options')
+        Answer = apps.get_model('surveys', 'Answer')
+        packed = Answer.objects.filter(question_id=checkbox.id).order_by('id')
+        self.assertEqual([(answer.selected_option_id, answer.selected_options) for answer in packed],
+                         [(None, [red.id]), (None, [blue.id])])
+        self.assertEqual(Answer.objects.get(question_id=radio.id, response__taker__username='alice').selected_option_id, yes.id)
+
+        # A multi-select answer in the packed layout counts once per option, once for its question
+        carol = apps.get_model('auth', 'User').objects.create(username='carol')
+        response = apps.get_model('surveys', 'Response').objects.create(survey_id=survey.id, taker=carol)
+        Answer.objects.create(response=response, question_id=checkbox.id, selected_options=[red.id, blue.id])
+        rebuild_tallies(apps, [survey.id])
+        OptionTally = apps.get_model('surveys', 'OptionTally')
+        QuestionTally = apps.get_model('surveys', 'QuestionTally')
+        self.assertEqual(dict(OptionTally.objects.values_list('option_id', 'count')), {yes.id: 2, red.id: 2, blue.id: 2})
+        self.assertEqual(dict(QuestionTally.objects.values_list('question_id', 'count')), {radio.id: 2, checkbox.id: 3})
+
+        # Unpacking keeps one option per answer, the most the old layout can hold
+        apps = self.migrate('0012_resultssnapshot')
+        Answer = apps.get_model('surveys', 'Answer')
+        unpacked = Answer.objects.filter(question_id=checkbox.id).order_by('id')
+        self.assertEqual([answer.selected_option_id for answer in unpacked], [red.id, blue.id, red.id])
+
+
+class OptionCountTests(TestCase):
+    def test_counts_include_checkbox_answers(self):
+        taker = User.objects.create_user('taker')
+        survey = Survey.objects.create(creator=taker, name='Colours', status=Survey.PUBLISHED)
+        question = Question.objects.create(survey=survey, text='Pick any', question_type='checkbox', position=1)
+        red = Option.objects.create(question=question, text='Red', position=1)
+        blue = Option.objects.create(question=question, text='Blue', position=2)
+        save_answers(survey, taker, [(question.id, None, None, [red.id, blue.id])])
+        save_answers(survey, User.objects.create_user('other'), [(question.id, None, None, [red.id])])
+        self.assertEqual((red.get_response_count(), blue.get_response_count()), (2, 1))
+        self.assertEqual((red.get_response_percentage(), blue.get_response_percentage()), (100.0, 50.0))
+
+
+@override_settings(SURVEY_PAGE_SIZE=2)
+class CreatorDashboardTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user('creator', is_staff=True)
+        self.client.force_login(self.creator)
+        for i in range(3):
+            Survey.objects.create(creator=self.creator, name=f'Draft {i}')
+        Survey.objects.create(creator=self.creator, name='Published', status=Survey.PUBLISHED)
+
+    def test_each_section_has_its_first_page(self):
+        response = self.client.get(reverse('creator_dashboard'))
+        self.assertEqual([survey.name for survey in response.context['drafts']], ['Draft 2', 'Draft 1'])
+        self.assertEqual([survey.name for survey in response.context['published']], ['Published'])
+        self.assertNotContains(response, "No published surveys found.")
+        self.assertFalse(response.context['published'].has_next)
+
+    def test_load_more_pages_one_section(self):
+        cursor = self.client.get(reverse('creator_dashboard')).context['drafts'].next_cursor
+        response = self.client.get(reverse('creator_dashboard_more'), {'status': Survey.DRAFT, 'cursor': cursor})
+        self.assertEqual([survey.name for survey in response.context['page']], ['Draft 0'])
+        self.assertContains(response, 'data-target="draft-rows"')
+        self.assertFalse(response.context['page'].has_next)
+
+    def test_load_more_requires_a_status(self):
+        response = self.client.get(reverse('creator_dashboard_more'))
+        self.assertRedirects(response, reverse('creator_dashboard'))
+
+    def test_dashboard_queries(self):
+        # Session, user, then one keyset page (with its response counts) per status section
+        with self.assertNumQueries(6):
+            self.client.get(reverse('creator_dashboard'))
+        for i in range(5):
+            survey = Survey.objects.create(creator=self.creator, name=f'Closed {i}', status=Survey.CLOSED)
+            Response.objects.create(survey=survey, taker=User.objects.create_user(f'taker{i}'))
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('creator_dashboard'))
+        self.assertEqual([survey.response_count for survey in response.context['closed']], [1, 1])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user('creator')
+        self.surveys = [Survey.objects.create(creator=creator, name=f'Survey {number}') for number in range(5)]
+        # Two surveys created at the same instant are ordered by id
+        Survey.objects.filter(id__in=[self.surveys[1].id, self.surveys[2].id]).update(created_at=self.surveys[1].created_at)
+
+    def test_pages_follow_each_other_without_gaps(self):
+        names = []
+        page = paginate(Survey.objects.all(), page_size=2)
+        names += [survey.name for survey in page]
+        while page.has_next:
+            page = paginate(Survey.objects.all(), page.next_cursor, page_size=2)
+            names += [survey.name for survey in page]
+        self.assertEqual(names, [f'Survey {number}' for number in (4, 3, 2, 1, 0)])
+
+    def test_tampered_cursor_is_the_first_page(self):
+        self.assertIsNone(decode_cursor('bm90IGpzb24'))
+        first = [survey.id for survey in paginate(Survey.objects.all(), page_size=2)]
+        self.assertEqual([survey.id for survey in paginate(Survey.objects.all(), 'bm90IGpzb24', page_size=2)], first)
+
+
+class DuplicateResponseMigrationTests(MigrationTestCase):
+    migrate_from = '0015_keyset_pagination_indexes'
+
+    def test_removes_duplicates_and_recounts(self):
+        User = self.apps.get_model('auth', 'User')
+        Survey = self.apps.get_model('surveys', 'Survey')
+        Question = self.apps.get_model('surveys', 'Question')
+        Option = self.apps.get_model('surveys', 'Option')
+        Response = self.apps.get_model('surveys', 'Response')
+        Answer = self.apps.get_model('surveys', 'Answer')
+        OptionTally = self.apps.get_model('surveys', 'OptionTally')
+        QuestionTally = self.apps.get_model('surveys', 'QuestionTally')
+        taker = User.objects.create(username='taker')
+        survey = Survey.objects.create(creator=taker, name='Twice', status='published')
+        question = Question.objects.create(survey=survey, text='Pick one', question_type='radio', position=1)
+        yes = Option.objects.create(question=question, text='Yes', position=1)
+        no = Option.objects.create(question=question, text='No', position=2)
+        first = Response.objects.create(survey=survey, taker=taker)
+        Answer.objects.create(response=first, question=question, selected_option=yes)
+        second = Response.objects.create(survey=survey, taker=taker)
+        Answer.objects.create(response=second, question=question, selected_option=no)
+        OptionTally.objects.create(survey=survey, option=yes, count=1)
+        OptionTally.objects.create(survey=survey, option=no, count=1)
+        QuestionTally.objects.create(survey=survey, question=question, count=2)
+
+        apps = self.migrate('0016_remove_duplicate_responses')
+        self.assertEqual(list(apps.get_model('surveys', 'Response').objects.values_list('id', flat=True)), [first.id])
+        OptionTally = apps.get_model('surveys', 'OptionTally')
+        QuestionTally = apps.get_model('surveys', 'QuestionTally')
+        self.assertEqual(dict(OptionTally.objects.values_list('option_id', 'count')), {yes.id: 1})
+        self.assertEqual(QuestionTally.objects.get(question_id=question.id).count, 1)
+
+
+class SaveAnswersTests(TestCase):
+    def setUp(self):
+        self.taker = User.objects.create_user('taker')
+        self.survey = Survey.objects.create(creator=self.taker, name='Once', status=Survey.PUBLISHED)
+        self.question = Question.objects.create(survey=self.survey, text='Comments', question_type='text', position=1)
+
+    def test_second_response_is_rejected(self):
+        save_answers(self.survey, self.taker, [(self.question.id, 'first', None, None)])
+        with self.assertRaisesMessage(SubmissionError, "already responded"):
+            save_answers(self.survey, self.taker, [(self.question.id, 'second', None, None)])
+        self.assertEqual(Answer.objects.get().text, 'first')
+
+    def test_other_integrity_errors_propagate(self):
+        # Two answers to one question violate (response, question), not the one-response rule
+        answers = [(self.question.id, 'a', None, None), (self.question.id, 'b', None, None)]
+        with self.assertRaises(IntegrityError):
+            save_answers(self.survey, self.taker, answers)
+        self.assertFalse(Response.objects.exists())
+
+
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user('creator')
+        self.survey = Survey.objects.create(creator=self.creator, name='Listed', status=Survey.PUBLISHED)
+
+    def listed_names(self, cursor=None):
+        return [survey.name for survey in get_listing_page('survey_list', cursor)]
+
+    def test_any_survey_save_invalidates_listings(self):
+        self.assertEqual(self.listed_names(), ['Listed'])
+        # A status change made outside the survey views, e.g. in the admin
+        with self.captureOnCommitCallbacks(execute=True):
+            self.survey.status = Survey.CLOSED
+            self.survey.save()
+        self.assertEqual(self.listed_names(), [])
+
+    def test_invalid_cursors_share_the_first_page(self):
+        self.listed_names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.listed_names('not-a-cursor'), ['Listed'])
+            self.assertEqual(self.listed_names('also%20garbage'), ['Listed'])
+
+
+class TakeSurveyQueryTests(TestCase):
+    def test_warm_take_survey_reads_the_structure_from_the_cache(self):
+        cache.clear()
+        taker = User.objects.create_user('taker')
+        survey = Survey.objects.create(creator=taker, name='Warm', status=Survey.PUBLISHED)
+        for position in range(1, 4):
+            question = Question.objects.create(survey=survey, text=f'Q{position}', question_type='radio', position=position)
+            Option.objects.create(question=question, text=f'Q{position} yes', position=1)
+        self.client.force_login(taker)
+        url = reverse('take_survey', args=[survey.id])
+        self.client.get(url)
+        # Session, user, survey: questions, options and their markup come from the cache
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'Q3 yes')
+
+
+class TakeSurveyRenderTests(TestCase):
+    def test_crowd_counts_are_rendered_outside_the_question_cache(self):
+        cache.clear()
+        taker = User.objects.create_user('taker')
+        survey = Survey.objects.create(creator=taker, name='Crowd', status=Survey.REPUBLISHED)
+        question = Question.objects.create(survey=survey, text='Pick one', question_type='radio', position=1)
+        yes = Option.objects.create(question=question, text='Yes', position=1)
+        self.client.force_login(taker)
+        url = reverse('take_republished_survey', args=[survey.id])
+        self.assertContains(self.client.get(url), 'Yes (0 Users)')
+
+        save_answers(survey, User.objects.create_user('other'), [(question.id, None, yes.id, None)])
+        cache.delete(caching.cache_key('crowd', survey.id))
+        # Same survey version: the question markup comes from the cache, the count is live
+        self.assertContains(self.client.get(url), 'Yes (1 Users)')
+
+    def test_question_list_is_one_cache_read(self):
+        cache.clear()
+        taker = User.objects.create_user('taker')
+        survey = Survey.objects.create(creator=taker, name='Long', status=Survey.PUBLISHED)
+        for position in range(1, 4):
+            Question.objects.create(survey=survey, text=f'Question {position}', question_type='text', position=position)
+        self.client.force_login(taker)
+        url = reverse('take_survey', args=[survey.id])
+        self.client.get(url)
+        with mock.patch.object(caching, 'cache', wraps=cache) as spy:
+            self.assertContains(self.client.get(url), 'Question 3')
+        spy.get.assert_called_once()
+        spy.set.assert_not_called()
+
+
+class SurveyEditTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user('creator')
+        self.survey = Survey.objects.create(creator=self.creator, name='Edited')
+        self.question = Question.objects.create(survey=self.survey, text='Pick one', question_type='radio', position=1)
+        self.yes = Option.objects.create(question=self.question, text='Yes', position=1)
+        self.no = Option.objects.create(question=self.question, text='No', position=2)
+
+    def post(self, *fields):
+        data = QueryDict(mutable=True)
+        data[f'questions[{self.question.id}][text]'] = 'Pick one'
+        data[f'questions[{self.question.id}][type]'] = 'radio'
+        for name, value in fields:
+            data.appendlist(f'questions[{self.question.id}][options][{name}]', value)
+        return parse_questions(data)
+
+    def test_added_option_keeps_its_place(self):
+        posted = self.post((self.yes.id, 'Yes'), ('new_1', 'Maybe'), (self.no.id, 'No'))
+        apply_survey_edit(self.survey, posted)
+        texts = list(self.question.options.order_by('position').values_list('text', 'position'))
+        self.assertEqual(texts, [('Yes', 1), ('Maybe', 2), ('No', 3)])
+
+    def test_unchanged_form_writes_nothing(self):
+        posted = self.post((self.yes.id, 'Yes'), (self.no.id, 'No'))
+        with self.assertNumQueries(4):  # savepoint, questions, options, release
+            self.assertEqual(apply_survey_edit(self.survey, posted), 0)
+
+    def test_removed_option_is_soft_deleted(self):
+        response = Response.objects.create(survey=self.survey, taker=self.creator)
+        answer = Answer.objects.create(response=response, question=self.question, selected_option=self.no)
+        self.assertEqual(apply_survey_edit(self.survey, self.post((self.yes.id, 'Yes'))), 1)
+        self.no.refresh_from_db()
+        self.assertTrue(self.no.is_deleted)
+        self.assertTrue(Answer.objects.filter(id=answer.id).exists())
+        # Removed options are no longer offered on the form
+        compiled = [option.id for option in compile_survey(self.survey).questions[0].options]
+        self.assertEqual(compiled, [self.yes.id])
+
+
+class CreateSurveyTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user('creator', is_staff=True)
+        self.client.force_login(self.creator)
+
+    def post(self, question_count, **fields):
+        data = {'survey_name': 'Created', 'description': 'New', 'action': 'publish'}
+        for number in range(1, question_count + 1):
+            data[f'questions[{number}][text]'] = f'Question {number}'
+            data[f'questions[{number}][type]'] = 'text' if number % 3 == 0 else 'radio'
+            data[f'questions[{number}][options][]'] = [f'Yes {number}', f'No {number}']
+        data.update(fields)
+        return self.client.post(reverse('create_survey'), data)
+
+    def test_creates_questions_and_options_in_bulk(self):
+        # Session, user; in one savepoint the survey, its questions and their options; the session's messages
+        with self.assertNumQueries(10):
+            response = self.post(3)
+        self.assertRedirects(response, reverse('creator_dashboard'), fetch_redirect_response=False)
+        survey = Survey.objects.get(name='Created')
+        self.assertEqual((survey.creator, survey.status), (self.creator, Survey.PUBLISHED))
+        self.assertEqual(
+            list(survey.questions.order_by('position').values_list('text', 'question_type', 'position')),
+            [('Question 1', 'radio', 1), ('Question 2', 'radio', 2), ('Question 3', 'text', 3)],
+        )
+        options = Option.objects.filter(question__survey=survey).order_by('question__position', 'position')
+        self.assertEqual(
+            list(options.values_list('question__position', 'text', 'position')),
+            [(1, 'Yes 1', 1), (1, 'No 1', 2), (2, 'Yes 2', 1), (2, 'No 2', 2)],
+        )
+
+    def test_invalid_survey_writes_nothing(self):
+        response = self.post(2, **{'questions[2][options][]': []})
+        self.assertRedirects(response, reverse('create_survey'), fetch_redirect_response=False)
+        self.assertFalse(Survey.objects.exists())
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual(messages, ["Question 2 ('Question 2') requires at least one option."])
+
+
+class SurveyValidationTests(TestCase):
+    def setUp(self):
+        self.survey = Survey.objects.create(creator=User.objects.create_user('creator'), name='Checked')
+        self.question = Question.objects.create(survey=self.survey, text='Pick one', question_type='radio', position=1)
+
+    def test_valid_survey(self):
+        Option.objects.create(question=self.question, text='Yes', position=1)
+        self.assertEqual(validate_survey(self.survey), [])
+
+    def test_reports_every_problem_at_once(self):
+        Question.objects.create(survey=self.survey, text='Pick any', question_type='checkbox', position=2)
+        Option.objects.create(question=self.question, text='Yes', position=1)
+        Option.objects.create(question=self.question, text='yes', position=2)
+        self.assertEqual(validate_survey(self.survey), [
+            "Question 1 ('Pick one') uses the option 'yes' more than once.",
+            "Question 2 ('Pick any') requires at least one option.",
+        ])
+
+    def test_ignores_soft_deleted_options(self):
+        Option.objects.create(question=self.question, text='Yes', position=1)
+        Option.objects.create(question=self.question, text='Yes', position=2, is_deleted=True)
+        self.assertEqual(validate_survey(self.survey), [])
+
+    def test_empty_structure(self):
+        self.assertEqual(check_structure([]), ["A survey needs at least one question."])
+
+
+class AdminChangelistQueryTests(TestCase):
+    """The survey, question and option changelists run a fixed number of queries, however many rows they show."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='password')
+        self.takers = [User.objects.create_user(f'taker{number}', password='password') for number in range(3)]
+        self.client.force_login(self.admin)
+
+    def create_answered_survey(self, name, question_count=3, option_count=4):
+        survey = Survey.objects.create(creator=self.admin, name=name, status=Survey.PUBLISHED)
+        questions = []
+        for position in range(1, question_count + 1):
+            question = Question.objects.create(survey=survey, text=f'{name} Q{position}', position=position)
+            options = [
+                Option.objects.create(question=question, text=f'Option {number}', position=number)
+                for number in range(1, option_count + 1)
+            ]
+            questions.append((question, options))
+
+        for number, taker in enumerate(self.takers):
+            response = Response.objects.create(survey=survey, taker=taker)
+            for question, options in questions:
+                Answer.objects.create(
+                    response=response, question=question, selected_option=options[number % option_count]
+                )
+        rebuild_survey_tallies(survey)
+        return survey
+
+    def assertChangelistQueries(self, model_name, expected):
+        url = reverse(f'admin:surveys_{model_name}_changelist')
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_survey_changelist(self):
+        self.create_answered_survey('First')
+        response = self.assertChangelistQueries('survey', 8)
+        self.assertContains(response, 'Option 1: 1 Users (33%)')
+
+        for number in range(5):
+            self.create_answered_survey(f'More {number}')
+        self.assertChangelistQueries('survey', 8)
+
+    def test_question_changelist(self):
+        self.create_answered_survey('First')
+        response = self.assertChangelistQueries('question', 6)
+        self.assertContains(response, 'Option 1: 1 responses')
+        self.assertContains(response, 'Option 1: 33.33%')
+
+        for number in range(5):
+            self.create_answered_survey(f'More {number}')
+        self.assertChangelistQueries('question', 6)
+
+    def test_option_changelist(self):
+        self.create_answered_survey('First')
+        self.assertChangelistQueries('option', 5)
+
+        for number in range(5):
+            self.create_answered_survey(f'More {number}')
+        self.assertChangelistQueries('option', 5)
+
+    def test_response_changelist(self):
+        self.create_answered_survey('First')
+        response = self.assertChangelistQueries('response', 6)
+        self.assertContains(response, 'taker1')
+
+        for number in range(5):
+            self.create_answered_survey(f'More {number}')
+        self.assertChangelistQueries('response', 6)
+
+    def test_answer_changelist(self):
+        survey = self.create_answered_survey('First')
+        question = Question.objects.create(survey=survey, text='Pick any', question_type='checkbox', position=4)
+        options = [Option.objects.create(question=question, text=f'Box {number}', position=number) for number in (1, 2)]
+        Answer.objects.create(
+            response=survey.responses.first(), question=question, selected_options=[option.id for option in options]
+        )
+        response = self.assertChangelistQueries('answer', 5)
+        self.assertContains(response, f'Options #{options[0].id}, #{options[1].id}')
+
+        for number in range(5):
+            self.create_answered_survey(f'More {number}')
+        self.assertChangelistQueries('answer', 5)
+
+    def test_searches_match_related_text_without_joins(self):
+        first = self.create_answered_survey('First')
+        self.create_answered_survey('Second')
+        other = User.objects.create_user('other')
+        Survey.objects.create(creator=other, name='Admin guide')
+
+        def search(model_name, term):
+            response = self.client.get(reverse(f'admin:surveys_{model_name}_changelist'), {'q': term})
+            return response.context['cl']
+
+        # Matches the name of one survey and the creator of the two others, each once
+        surveys = search('survey', 'admin').result_list
+        self.assertEqual(sorted(survey.name for survey in surveys), ['Admin guide', 'First', 'Second'])
+        self.assertEqual([survey.name for survey in search('survey', 'admin first').result_list], ['First'])
+        self.assertEqual(
+            sorted(question.text for question in search('question', 'first').result_list),
+            ['First Q1', 'First Q2', 'First Q3'],
+        )
+        options = search('option', '"first q1"').result_list
+        self.assertEqual(len(options), 4)
+        self.assertTrue(all(option.question.survey_id == first.id for option in options))
+
+
+class ResponseSearchTests(TestCase):
+    def test_search_text_answers(self):
+        creator = User.objects.create_user('creator', password='password', is_staff=True)
+        survey = Survey.objects.create(creator=creator, name='Feedback', status=Survey.PUBLISHED)
+        question = Question.objects.create(survey=survey, text='Comments?', question_type='text', position=1)
+        for username, text in (('alice', 'Delivery was slow'), ('bob', 'Great staff')):
+            response = Response.objects.create(survey=survey, taker=User.objects.create_user(username))
+            Answer.objects.create(response=response, question=question, text=text)
+
+        self.client.force_login(creator)
+        url = reverse('survey_response_table', args=[survey.id])
+        response = self.client.get(url, {'q': 'delivery'})
+        self.assertContains(response, 'alice')
+        self.assertNotContains(response, 'bob')
+        response = self.client.get(url, {'q': 'nothing like this'})
+        self.assertContains(response, 'No responses match')
+
+
+class ResponseExportTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user('creator', password='password', is_staff=True)
+        self.survey = Survey.objects.create(creator=self.creator, name='Feedback', status=Survey.PUBLISHED)
+        radio = Question.objects.create(survey=self.survey, text='Rating', question_type='radio', position=1)
+        checkbox = Question.objects.create(survey=self.survey, text='Liked', question_type='checkbox', position=2)
+        text = Question.objects.create(survey=self.survey, text='Comments', question_type='text', position=3)
+        good = Option.objects.create(question=radio, text='Good', position=1)
+        staff = Option.objects.create(question=checkbox, text='Staff', position=1)
+        price = Option.objects.create(question=checkbox, text='Price', position=2)
+
+        self.first = Response.objects.create(survey=self.survey, taker=User.objects.create_user('alice'))
+        Answer.objects.create(response=self.first, question=radio, selected_option=good)
+        Answer.objects.create(response=self.first, question=checkbox, selected_options=[staff.id, price.id])
+        Answer.objects.create(response=self.first, question=text, text='Quick, "friendly"')
+        self.second = Response.objects.create(survey=self.survey, taker=User.objects.create_user('bob'))
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_export_pivots_answers(self):
+        self.client.force_login(self.creator)
+        rows = self.read_csv(self.client.get(reverse('export_survey_responses', args=[self.survey.id])))
+        self.assertEqual(rows[0], ['response_id', 'taker', 'submitted_at', 'Rating', 'Liked', 'Comments'])
+        self.assertEqual(rows[1][:2], [str(self.first.id), 'alice'])
+        self.assertEqual(rows[1][3:], ['Good', 'Staff; Price', 'Quick, "friendly"'])
+        self.assertEqual(rows[2][:2], [str(self.second.id), 'bob'])
+        self.assertEqual(rows[2][3:], ['', '', ''])
+        self.assertEqual(len(rows), 3)
+
+    def test_export_neutralises_formulas(self):
+        comments = self.survey.questions.get(text='Comments')
+        Answer.objects.create(response=self.second, question=comments, text='=HYPERLINK("http://x", "y")')
+        Option.objects.filter(text='Good').update(text='+1')
+        Question.objects.filter(id=comments.id).update(text='@Comments')
+        self.client.force_login(self.creator)
+        rows = self.read_csv(self.client.get(reverse('export_survey_responses', args=[self.survey.id])))
+        self.assertEqual(rows[0][5], "'@Comments")
+        self.assertEqual(rows[1][3], "'+1")
+        self.assertEqual(rows[2][5], """'=HYPERLINK("http://x", "y")""")
+
+    def test_export_requires_creator(self):
+        other = User.objects.create_user('other', password='password', is_staff=True)
+        self.client.force_login(other)
+        response = self.client.get(reverse('export_survey_responses', args=[self.survey.id]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_action(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        response = self.client.post(
+            reverse('admin:surveys_survey_changelist'),
+            {'action': 'export_responses_csv', '_selected_action': [self.survey.id]},
+        )
+        self.assertEqual(len(self.read_csv(response)), 3)
+
+    @skipUnless(PARQUET_AVAILABLE, "pyarrow is not installed")
+    def test_parquet_export(self):
+        import pyarrow.parquet as pq
+
+        self.client.force_login(self.creator)
+        response = self.client.get(reverse('export_survey_responses_parquet', args=[self.survey.id]))
+        table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.column_names, ['response_id', 'taker', 'submitted_at', 'Rating', 'Liked', 'Comments'])
+        self.assertEqual(str(table.schema.field('Rating').type), 'dictionary<values=string, indices=int32, ordered=0>')
+        rows = table.to_pylist()
+        self.assertEqual(
+            [rows[0]['taker'], rows[0]['Rating'], rows[0]['Liked'], rows[0]['Comments']],
+            ['alice', 'Good', ['Staff', 'Price'], 'Quick, "friendly"'],
+        )
+        self.assertEqual([rows[1]['taker'], rows[1]['Rating'], rows[1]['Liked']], ['bob', None, None])
+
+    def test_parquet_export_without_pyarrow(self):
+        self.client.force_login(self.creator)
+        with mock.patch('surveys.views.PARQUET_AVAILABLE', False):
+            response = self.client.get(reverse('export_survey_responses_parquet', args=[self.survey.id]))
+        self.assertRedirects(response, reverse('survey_response_table', args=[self.survey.id]))
@@ -14,6 +14,8 @@ urlpatterns = [
     # Role-Based Dashboards
     path('creator_dashboard/', views.creator_dashboard, name='creator_dashboard'),  # Creator dashboard
     path('taker_dashboard/', views.taker_dashboard, name='taker_dashboard'),  # Taker dashboard
+    path('creator_dashboard/more/', views.creator_dashboard_more, name='creator_dashboard_more'),  # Next page of the creator dashboard
+    path('taker_dashboard/more/', views.taker_dashboard_more, name='taker_dashboard_more'),  # Next page of the taker dashboard
 
     # Survey Management for Creators
     path('create_survey/', views.create_survey, name='create_survey'),  # Create a new survey
@@ -24,6 +26,7 @@ urlpatterns = [
 
     # Survey Taker Pages
     path('survey_list/', views.survey_list, name='survey_list'),  # List available surveys
+    path('survey_list/more/', views.survey_list_more, name='survey_list_more'),  # Next page of available surveys
     path('take_survey/<int:survey_id>/', views.take_survey, name='take_survey'),  # Take a survey
     path('completion_message/', views.completion_message, name='completion_message'),  # Survey completion message
 
@@ -38,6 +41,9 @@ urlpatterns = [
 
     # Survey Response Table (Admin View of Survey Responses)
     path('survey_responses/<int:survey_id>/', views.survey_response_table, name='survey_response_table'),  # View survey responses table
+    path('survey_responses/<int:survey_id>/export/', views.export_survey_responses, name='export_survey_responses'),  # Download responses as CSV
+    path('survey_responses/<int:survey_id>/export/parquet/', views.export_survey_responses_parquet, name='export_survey_responses_parquet'),  # Download responses as Parquet
+    path('survey_responses/<int:survey_id>/more/', views.survey_response_table_more, name='survey_response_table_more'),  # Next page of responses
 
     # Password Reset Pages
     path('password_reset/', auth_views.PasswordResetView.as_view(), name='password_reset'),  # Request password reset
@@ -0,0 +1,70 @@
+from .models import Option, Question
+
+QUESTION_TYPES = {value for value, _ in Question.QUESTION_TYPES}
+OPTION_QUESTION_TYPES = ('radio', 'checkbox')
+
+
+def check_structure(structure):
+    """
+    Check a survey's structure in memory and return a list of error messages (empty when valid).
+    `structure` is a list of (question, options) pairs of Question and Option instances,
+    saved or not, so the same checks serve stored surveys and forms about to be saved.
+    """
+    errors = []
+    if not structure:
+        errors.append("A survey needs at least one question.")
+
+    question_positions = set()
+    for number, (question, options) in enumerate(structure, start=1):
+        label = f"Question {number}"
+        if not question.text.strip():
+            errors.append(f"{label} has no text.")
+        else:
+            label = f"Question {number} ('{question.text}')"
+
+        if question.position <= 0:
+            errors.append(f"{label} has an invalid position.")
+        elif question.position in question_positions:
+            errors.append(f"{label} has the same position as another question.")
+        question_positions.add(question.position)
+
+        if question.question_type not in QUESTION_TYPES:
+            errors.append(f"{label} has an invalid type '{question.question_type}'.")
+            continue
+        if question.question_type not in OPTION_QUESTION_TYPES:
+            continue
+
+        if not options:
+            errors.append(f"{label} requires at least one option.")
+        option_texts = set()
+        option_positions = set()
+        for option in options:
+            text = option.text.strip().lower()
+            if not text:
+                errors.append(f"{label} has an option with no text.")
+            elif text in option_texts:
+                errors.append(f"{label} uses the option '{option.text}' more than once.")
+            option_texts.add(text)
+
+            if option.position <= 0:
+                errors.append(f"{label} has an option with an invalid position.")
+            elif option.position in option_positions:
+                errors.append(f"{label} has two options at the same position.")
+            option_positions.add(option.position)
+
+    return errors
+
+
+def load_structure(survey):
+    """Load a survey's live questions and options in two queries, as (question, options) pairs."""
+    questions = list(survey.questions.filter(is_deleted=False).order_by('position', 'id'))
+    options_by_question = {}
+    options = Option.objects.filter(question__in=questions, is_deleted=False).order_by('position', 'id')
+    for option in options:
+        options_by_question.setdefault(option.question_id, []).append(option)
+    return [(question, options_by_question.get(question.id, [])) for question in questions]
+
+
+def validate_survey(survey):
+    """Check a stored survey before it is published; returns a list of error messages."""
+    return check_structure(load_structure(survey))
@@ -1,14 +1,25 @@
 import pprint
 import logging
+import tempfile
 from django.db import transaction  # To group operations and handle rollbacks if needed
+from django.http import FileResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login as auth_login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm
 from django.middleware.csrf import get_token  # CSRF token debugging
-from .models import Survey, Question, Option, Response, Answer
-from django.db.models import Count
+from .models import Survey, Response, Answer, live_options
+from .submission import SubmissionError, compile_survey, submit_response
+from .snapshots import freeze_results
+from .caching import get_crowd_results, get_listing_page, get_question_markup, get_results_tally
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from .pagination import paginate
+from .exports import PARQUET_AVAILABLE, stream_responses_csv, write_responses_parquet
+from .authoring import apply_survey_edit, build_new_structure, create_survey_with_questions, parse_questions
+from .validation import check_structure, validate_survey
 from .models import Survey
 
 
@@ -79,6 +90,46 @@ def logout_view(request):
 
 
 # Creator Dashboard
+def _creator_surveys(request):
+    """The creator's surveys (every survey for a superuser), annotated with their response stats."""
+    # If the user is a superuser, show all surveys; otherwise, show only the creator's surveys
+    surveys = Survey.objects.filter(is_deleted=False)
+    if not request.user.is_superuser:
+        surveys = surveys.filter(creator=request.user)
+
+    # Response count and last response time as correlated subqueries,
+    # so they are only computed for the rows of the requested page
+    responses = Response.objects.filter(survey=OuterRef('pk')).order_by().values('survey')
+    return surveys.annotate(
+        response_count=Coalesce(Subquery(responses.annotate(count=Count('id')).values('count')), 0),
+        last_response_at=Subquery(responses.annotate(last=Max('submitted_at')).values('last')),
+    )
+
+
+def _creator_dashboard_page(request, status, cursor=None):
+    """Load one page of the creator's surveys with the given status."""
+    return paginate(_creator_surveys(request).filter(status=status), cursor)
+
+
+def _creator_dashboard_context(request):
+    """Load the first page of each status section of the creator dashboard."""
+    # Each status section is paged with its own cursor, so a section is only empty when the
+    # creator has no surveys with that status; a cursor in the URL applies to its own section
+    pages = {}
+    for status, _ in Survey.STATUS_CHOICES:
+        cursor = request.GET.get('cursor') if request.GET.get('status') == status else None
+        pages[status] = _creator_dashboard_page(request, status, cursor)
+
+    return {
+        'more_url': reverse('creator_dashboard_more'),
+        'drafts': pages[Survey.DRAFT],
+        'published': pages[Survey.PUBLISHED],
+        'republished': pages[Survey.REPUBLISHED],  # Pass republished surveys to the template
+        'closed': pages[Survey.CLOSED],
+        'is_superuser': request.user.is_superuser,  # For conditional logic in the template
+    }
+
+
 def creator_dashboard(request):
     """Render the creator dashboard for staff users."""
     # Ensure the user is authenticated and a staff user
@@ -90,32 +141,25 @@ def creator_dashboard(request):
         messages.error(request, "Access denied! You do not have permission to access the creator dashboard.")
         return redirect('taker_dashboard')
 
-    # If the user is a superuser, show all surveys; otherwise, show only the creator's surveys
-    if request.user.is_superuser:
-        drafts = Survey.objects.filter(status='draft', is_deleted=False)
-        published = Survey.objects.filter(status='published', is_deleted=False)
-        republished = Survey.objects.filter(status='republished', is_deleted=False)
-        closed = Survey.objects.filter(status='closed', is_deleted=False)
-    else:
-        drafts = Survey.objects.filter(creator=request.user, status='draft', is_deleted=False)
-        published = Survey.objects.filter(creator=request.user, status='published', is_deleted=False)
-        republished = Survey.objects.filter(creator=request.user, status='republished', is_deleted=False)
-        closed = Survey.objects.filter(creator=request.user, status='closed', is_deleted=False)
-
-    # Added logic to handle the renamed button labels for published and republished results
-    for survey in published:
-        survey.button_label = "View Published Results"
-    for survey in republished:
-        survey.button_label = "View RePublished Results"
-
-    # Render the dashboard with the filtered surveys
-    return render(request, 'surveys/creator_dashboard.html', {
-        'page_title': 'Creator Dashboard',
-        'drafts': drafts,
-        'published': published,
-        'republished': republished,  # Pass republished surveys to the template
-        'closed': closed,
-        'is_superuser': request.user.is_superuser,  # For conditional logic in the template
+    # Render the first page of the dashboard; older surveys are fetched with "Load more"
+    context = _creator_dashboard_context(request)
+    context['page_title'] = 'Creator Dashboard'
+    return render(request, 'surveys/creator_dashboard.html', context)
+
+
+def creator_dashboard_more(request):
+    """Render the next page of the creator dashboard as a fragment of table rows."""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return redirect('creator_dashboard')
+
+    # Only the section whose "Load more" was clicked is paged
+    status = request.GET.get('status')
+    if status not in dict(Survey.STATUS_CHOICES):
+        return redirect('creator_dashboard')
+    return render(request, 'surveys/creator_dashboard_more.html', {
+        'page': _creator_dashboard_page(request, status, request.GET.get('cursor')),
+        'status': status,
+        'more_url': reverse('creator_dashboard_more'),
     })
 
 
@@ -123,21 +167,44 @@ def creator_dashboard(request):
 
 
 # Taker Dashboard
+def _taker_dashboard_context(request):
+    """Load one page of the published and republished surveys, partitioned by status."""
+    # The page is shared by every taker through the listings cache
+    page = get_listing_page('taker_dashboard', request.GET.get('cursor'))
+
+    # Which of these surveys this taker has already answered (one small query on the unique index)
+    answered_ids = set(
+        Response.objects.filter(taker=request.user, survey_id__in=[survey.id for survey in page])
+        .values_list('survey_id', flat=True)
+    )
+    for survey in page:
+        survey.answered = survey.id in answered_ids
+
+    return {
+        'page': page,
+        'more_url': reverse('taker_dashboard_more'),
+        'published_surveys': [survey for survey in page if survey.status == Survey.PUBLISHED],
+        'republished_surveys': [survey for survey in page if survey.status == Survey.REPUBLISHED],
+    }
+
+
 def taker_dashboard(request):
     if not request.user.is_authenticated:
         return redirect('login')
     if request.user.is_staff:
         return redirect('creator_dashboard')
 
-    # Retrieve published and republished surveys for the taker
-    published_surveys = Survey.objects.filter(status='published', is_deleted=False)
-    republished_surveys = Survey.objects.filter(status='republished', is_deleted=False)
+    # Retrieve the first page of published and republished surveys for the taker
+    context = _taker_dashboard_context(request)
+    context['page_title'] = 'Taker Dashboard'
+    return render(request, 'surveys/taker_dashboard.html', context)
 
-    return render(request, 'surveys/taker_dashboard.html', {
-        'page_title': 'Taker Dashboard',
-        'published_surveys': published_surveys,
-        'republished_surveys': republished_surveys,
-    })
+
+def taker_dashboard_more(request):
+    """Render the next page of the taker dashboard as a fragment of list items."""
+    if not request.user.is_authenticated or request.user.is_staff:
+        return redirect('taker_dashboard')
+    return render(request, 'surveys/taker_dashboard_more.html', _taker_dashboard_context(request))
 
 
 
@@ -147,17 +214,29 @@ def survey_list(request):
     if not request.user.is_authenticated:
         return redirect('login')
 
-    surveys = Survey.objects.filter(status='published', is_deleted=False)
-    return render(request, 'surveys/survey_list.html', {'page_title': 'Available Surveys', 'surveys': surveys})
+    page = get_listing_page('survey_list', request.GET.get('cursor'))
+    return render(request, 'surveys/survey_list.html', {
+        'page_title': 'Available Surveys',
+        'surveys': page.items,
+        'page': page,
+        'more_url': reverse('survey_list_more'),
+    })
 
 
-# Create Survey
-from django.shortcuts import render, redirect
-from django.contrib import messages
-from django.db import transaction
-from .models import Survey, Question, Option
+def survey_list_more(request):
+    """Render the next page of the survey list as a fragment of table rows."""
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    page = get_listing_page('survey_list', request.GET.get('cursor'))
+    return render(request, 'surveys/survey_list_more.html', {
+        'surveys': page.items,
+        'page': page,
+        'more_url': reverse('survey_list_more'),
+    })
 
 
+# Create Survey
 def create_survey(request):
     """Allow creators to create new surveys."""
     if not request.user.is_authenticated or not request.user.is_staff:
@@ -171,59 +250,28 @@ def create_survey(request):
         action = request.POST.get('action', 'draft')  # 'draft' or 'publish'
 
         if survey_name:
-            try:
-                # Create the survey
-                survey = Survey.objects.create(
-                    name=survey_name,
-                    description=description,
-                    status='published' if action == 'publish' else 'draft',
-                    creator=request.user,
-                )
-                print(f"Survey Created: {survey}")
-
-                # Save questions and options
-                question_count = 0
-                for key in request.POST.keys():
-                    if key.startswith('questions[') and key.endswith('][text]'):
-                        question_count += 1
-                        question_text = request.POST.get(key, '').strip()
-                        question_key = key.split('[')[1].split(']')[0]
-                        question_type = request.POST.get(f"questions[{question_key}][type]", 'radio').strip()  # Change 'multiple_choice' to 'radio'
-
-                        if question_text:
-                            question = Question.objects.create(
-                                survey=survey,
-                                text=question_text,
-                                question_type=question_type,
-                            )
-                            print(f"Question Saved: {question.text}")
-
-                            # Save options if the question type requires them
-                            if question_type in ["radio", "checkbox"]:  # updated to 'radio' instead of 'multiple_choice'
-                                options = request.POST.getlist(f"questions[{question_key}][options][]")
-                                if not options:
-                                    raise ValueError(f"Question '{question_text}' requires at least one option.")
-                                for option_text in options:
-                                    if option_text.strip():
-                                        Option.objects.create(
-                                            question=question,
-                                            text=option_text.strip(),
-                                        )
-                                        print(f"Option Saved: {option_text.strip()}")
-
-                if question_count == 0:
-                    survey.delete()  # Rollback survey if no questions were added
-                    messages.error(request, "You must add at least one question to the survey.")
-                    return redirect('create_survey')
-
-                # Display success message
-                messages.success(request, f"Survey '{survey.name}' saved as {survey.status}!")
-                return redirect('creator_dashboard')
-
-            except Exception as e:
-                print(f"Error Creating Survey: {e}")
-                messages.error(request, "An error occurred while creating the survey.")
+            # Parse the nested questions[...] fields once and validate the whole survey in memory,
+            # before touching the database
+            structure = build_new_structure(parse_questions(request.POST))
+            errors = check_structure(structure)
+            if errors:
+                for error in errors:
+                    messages.error(request, error)
                 return redirect('create_survey')
+
+            # Survey, questions and options are inserted in bulk, in one transaction
+            survey = create_survey_with_questions(
+                request.user,
+                survey_name,
+                description,
+                Survey.PUBLISHED if action == 'publish' else Survey.DRAFT,
+                structure,
+            )
+            logger.info(f"Created survey {survey.id} with {len(structure)} questions")
+
+            # Display success message
+            messages.success(request, f"Survey '{survey.name}' saved as {survey.status}!")
+            return redirect('creator_dashboard')
         else:
             messages.error(request, "Survey name cannot be empty!")
 
@@ -247,55 +295,38 @@ def edit_survey(request, survey_id):
     survey = get_object_or_404(Survey, id=survey_id, creator=request.user, is_deleted=False)
 
     # Fetch related questions
-    questions = survey.questions.all()
+    questions = survey.questions.all().prefetch_related(live_options())
 
     if request.method == "POST":
         # Update survey details
         survey.name = request.POST.get('survey_name', survey.name)
         survey.description = request.POST.get('description', survey.description)
-        survey.save()
-
-        # Process each question from the POST data
-        for key, value in request.POST.items():
-            if key.startswith("questions[") and key.endswith("][text]"):
-                question_id = key.split('[')[1].split(']')[0]
-
-                # Handle new and existing questions
-                if question_id.startswith("new_"):
-                    # Create a new question
-                    question = Question.objects.create(
-                        survey=survey,
-                        text=value.strip(),
-                        question_type=request.POST.get(f"questions[{question_id}][type]", "text"),
-                        position=len(questions) + 1,
-                    )
-                else:
-                    # Update an existing question
-                    try:
-                        question = Question.objects.get(id=question_id, survey=survey)
-                        question.text = value.strip()
-                        question.question_type = request.POST.get(f"questions[{question_id}][type]", question.question_type)
-                        question.save()
-                    except Question.DoesNotExist:
-                        continue
-
-                # Process options for the question
-                options_key = f"questions[{question_id}][options][]"
-                if options_key in request.POST:
-                    # Remove existing options (if any) before saving updated ones
-                    question.options.all().delete()
-
-                    for option_text in request.POST.getlist(options_key):
-                        if option_text.strip():
-                            Option.objects.create(question=question, text=option_text.strip())
 
         # Handle survey status
         action = request.POST.get('action')
         if action == "save_draft":
             survey.status = Survey.DRAFT
-        elif action == "publish":
-            survey.status = Survey.PUBLISHED
-        survey.save()
+
+        with transaction.atomic():
+            # Apply the posted questions and options as a diff against the current structure;
+            # unchanged options keep their ids (and their answers)
+            removed_options = apply_survey_edit(survey, parse_questions(request.POST))
+
+            # Only publish the edited survey if the whole structure is valid
+            errors = validate_survey(survey) if action == "publish" else []
+            if action == "publish" and not errors:
+                survey.status = Survey.PUBLISHED
+
+            # Saving bumps updated_at, the version the survey definition caches are keyed on
+            survey.save()
+        if removed_options:
+            logger.info(f"Removed {removed_options} options from survey {survey.id} while editing")
+
+        if errors:
+            for error in errors:
+                messages.error(request, error)
+            messages.warning(request, f"Survey '{survey.name}' was saved but not published.")
+            return redirect('edit_survey', survey_id=survey.id)
 
         messages.success(request, f"Survey '{survey.name}' has been updated!")
         return redirect('creator_dashboard')
@@ -341,9 +372,11 @@ def close_survey(request, survey_id):
         
         # Ensure the survey is republished before closing
         elif survey.status == 'republished':
-            # Update the survey's status to 'closed'
-            survey.status = 'closed'
-            survey.save()
+            # Update the survey's status to 'closed' and freeze its final results
+            with transaction.atomic():
+                survey.status = 'closed'
+                survey.save()
+                freeze_results(survey)
             messages.success(request, f"Survey '{survey.name}' has been closed successfully!")
 
         # If the survey is not republished, inform the user
@@ -376,54 +409,33 @@ def take_survey(request, survey_id):
 
     # Fetch the survey and ensure it is published or republished
     survey = get_object_or_404(Survey, id=survey_id, status__in=['published', 'republished'], is_deleted=False)
-    questions = survey.questions.filter(is_deleted=False).prefetch_related('options')
 
     if request.method == 'POST':
-        print("POST Data:", request.POST)  # Debugging incoming POST data
-
-        with transaction.atomic():  # Ensure atomicity for database operations
-            # Create a response for the current user
-            response = Response.objects.create(survey=survey, taker=request.user)
-            print(f"Created Response ID: {response.id}")
-
-            # Process each question
-            for question in questions:
-                print(f"Processing Question ID: {question.id}, Text: {question.text}, Type: {question.question_type}")
-
-                if question.question_type == 'text':
-                    # Handle text-based responses
-                    answer_text = request.POST.get(f"question_{question.id}", "").strip()
-                    print(f"Text answer for Question {question.id}: {answer_text}")
-                    if answer_text:
-                        Answer.objects.create(
-                            response=response,
-                            question=question,
-                            text=answer_text
-                        )
-
-                elif question.question_type in ['radio', 'checkbox']:  # Updated 'multiple_choice' to 'radio'
-                    # Handle option-based responses
-                    selected_option_ids = request.POST.getlist(f"question_{question.id}")
-                    print(f"Selected options for Question {question.id}: {selected_option_ids}")
-                    for option_id in selected_option_ids:
-                        selected_option = Option.objects.filter(id=option_id, question=question).first()
-                        if selected_option:
-                            Answer.objects.create(
-                                response=response,
-                                question=question,
-                                selected_option=selected_option
-                            )
+        try:
+            submit_response(survey, request.user, request.POST)
+        except SubmissionError as e:
+            messages.error(request, str(e))
+            return redirect('take_survey', survey_id=survey.id)
 
         # Success message based on survey type
         survey_type = "republished" if survey.status == 'republished' else "published"
         messages.success(request, f"Your response to the {survey_type} survey '{survey.name}' has been submitted successfully!")
         return redirect('completion_message')
 
-    # Render the survey-taking page
+    # Aggregated results for republished surveys, shared by every taker through the crowd cache
+    aggregated_results = {}
+    if survey.status == 'republished':
+        aggregated_results = get_crowd_results(survey)['aggregated_data']
+
+    # Render the survey-taking page from the cached survey definition (no structure queries once warm)
+    schema = compile_survey(survey)
     return render(request, 'surveys/take_survey.html', {
         'page_title': f"Take Survey: {survey.name}",
         'survey': survey,
-        'questions': questions,
+        'questions': schema.questions,
+        'aggregated_results': aggregated_results,
+        # The rendered questions are cached per survey version; crowd results are rendered around them
+        'question_markup': get_question_markup(schema, 'surveys/take_survey_question.html'),
     })
     
     
@@ -437,56 +449,28 @@ def take_republished_survey(request, survey_id):
 
     # Fetch the republished survey
     survey = get_object_or_404(Survey, id=survey_id, status=Survey.REPUBLISHED, is_deleted=False)
-    questions = survey.questions.filter(is_deleted=False)
 
     if request.method == 'POST':
-        with transaction.atomic():  # Ensure atomicity for database operations
-            # Create a response object to store the survey taker's answers
-            response = Response.objects.create(survey=survey, taker=request.user)
-
-            # Loop through each question and save answers
-            for question in questions:
-                # Handle text-based responses
-                if question.question_type == 'text':
-                    answer_text = request.POST.get(f"question_{question.id}")
-                    if answer_text:
-                        Answer.objects.create(
-                            response=response,
-                            question=question,
-                            text=answer_text
-                        )
-                # Handle option-based responses (radio or checkbox)
-                elif question.question_type in ['radio', 'multiple_choice']:
-                    selected_option_ids = request.POST.getlist(f"question_{question.id}")
-                    for option_id in selected_option_ids:
-                        selected_option = get_object_or_404(Option, id=option_id, question=question)
-                        Answer.objects.create(
-                            response=response,
-                            question=question,
-                            selected_option=selected_option
-                        )
-            
-            messages.success(request, "Your responses have been submitted successfully!")
-            return redirect('completion_message')  # Redirect to a success page or results page
-
-    # Prepare aggregated results for displaying the "Wisdom of the Crowd"
-    aggregated_results = {}
-    for question in questions:
-        options_data = []
-        total_responses = sum(option.answers.count() for option in question.options.all())
-        for option in question.options.all():
-            selected_count = option.answers.count()
-            options_data.append({
-                'option': option.text,
-                'count': selected_count,
-            })
-        aggregated_results[question.id] = options_data
+        try:
+            submit_response(survey, request.user, request.POST)
+        except SubmissionError as e:
+            messages.error(request, str(e))
+            return redirect('take_republished_survey', survey_id=survey.id)
+
+        messages.success(request, "Your responses have been submitted successfully!")
+        return redirect('completion_message')  # Redirect to a success page or results page
+
+    # The "Wisdom of the Crowd" is precomputed once and shared by every taker
+    crowd = get_crowd_results(survey)
 
-    # Render the survey-taking page with aggregated data
+    # Render the survey-taking page with aggregated data, from the cached survey definition
+    schema = compile_survey(survey)
     return render(request, 'surveys/republished_survey_taker.html', {
         'survey': survey,
-        'questions': questions,
-        'aggregated_results': aggregated_results,
+        'questions': schema.questions,
+        'option_counts': crowd['option_counts'],
+        # The rendered questions are cached per survey version; crowd counts are rendered around them
+        'question_markup': get_question_markup(schema, 'surveys/republished_survey_question.html'),
         'page_title': f"Take Republished Survey: {survey.name}",
     })
 
@@ -508,25 +492,16 @@ def survey_results(request, survey_id):
     survey = get_object_or_404(Survey, id=survey_id, status=Survey.PUBLISHED, is_deleted=False)
     results = []
 
+    # Option counts come from the shared results cache
+    tally = get_results_tally(survey)
+
     # Only fetch results for published surveys
-    for question in survey.questions.filter(is_deleted=False):
+    for question in survey.questions.filter(is_deleted=False).prefetch_related(live_options()):
         question_data = {
             'text': question.text,  # Question text to be displayed
-            'options': []  # Options for each question
+            'options': tally.option_stats(question.options.all()),  # Option text, response count and percentage
         }
 
-        total_responses = sum(option.answers.count() for option in question.options.all())
-
-        # Collect data for each option
-        for option in question.options.all():
-            selected_count = option.answers.count()
-            percentage = (selected_count / total_responses * 100) if total_responses > 0 else 0
-            question_data['options'].append({
-                'option': option.text,  # Option text
-                'count': selected_count,  # Response count
-                'percentage': round(percentage, 2)  # Percentage of total responses
-            })
-
         # Append formatted results for each question
         results.append(question_data)
 
@@ -562,26 +537,16 @@ def aggregated_results(request, survey_id):
         return redirect('creator_dashboard')
 
     # Prepare aggregated results for questions
+    tally = get_results_tally(survey)
     questions_with_results = []
-    for question in survey.questions.all():
-        options_data = []
-        total_responses = Answer.objects.filter(question=question).count()
-
-        # Calculate option counts and percentages
-        for option in question.options.all():
-            option_count = Answer.objects.filter(selected_option=option).count()
-            percentage = (option_count / total_responses * 100) if total_responses > 0 else 0
-            options_data.append({
-                'option': option.text,
-                'count': option_count,
-                'percentage': round(percentage, 2),
-            })
+    for question in survey.questions.prefetch_related(live_options()):
+        total_responses = tally.total(question)
 
         # Add question and associated results
         questions_with_results.append({
             'question_text': question.text,
             'total_responses': total_responses,
-            'options': options_data,
+            'options': tally.option_stats(question.options.all(), total=total_responses),
         })
 
     # Check for results label (View Published Results or View RePublished Results)
@@ -604,63 +569,33 @@ logger = logging.getLogger(__name__)
 def submit_survey(request, survey_id):
     """
     Handle survey submission by the taker.
-    This function processes both text-based and option-based responses
-    and ensures data integrity with transaction management.
+    Text and option-based answers are validated and saved by the shared
+    submission engine in a single transaction.
     """
+    if not request.user.is_authenticated:
+        messages.error(request, "You must log in to take a survey.")
+        return redirect('login')
+
     if request.method == 'POST':
-        try:
-            with transaction.atomic():  # Ensure atomicity for database operations
-                # Fetch the survey and ensure it is published or republished
-                survey = get_object_or_404(Survey, id=survey_id, status__in=['published', 'republished'], is_deleted=False)
-
-                # Create a response object for the current user
-                response = Response.objects.create(survey=survey, taker=request.user)
-
-                # Debugging: Log incoming POST data
-                logger.debug(f"POST Data: {request.POST}")
-
-                # Fetch all questions related to the survey
-                questions = survey.questions.filter(is_deleted=False).prefetch_related('options')
-
-                for question in questions:
-                    logger.debug(f"Processing Question ID: {question.id}, Text: {question.text}, Type: {question.question_type}")
-
-                    if question.question_type == 'text':
-                        # Process text responses
-                        answer_text = request.POST.get(f"question_{question.id}", "").strip()
-                        if answer_text:
-                            Answer.objects.create(
-                                response=response,
-                                question=question,
-                                text=answer_text
-                            )
-                            logger.debug(f"Saved text answer for Question {question.id}: {answer_text}")
-
-                    elif question.question_type in ['radio', 'checkbox']:  # 'multiple_choice' replaced with 'radio'
-                        # Process selected options for radio or checkbox questions
-                        selected_option_ids = request.POST.getlist(f"question_{question.id}")
-                        logger.debug(f"Selected Option IDs for Question {question.id}: {selected_option_ids}")
-                        for option_id in selected_option_ids:
-                            selected_option = Option.objects.filter(id=option_id, question=question).first()
-                            if selected_option:
-                                Answer.objects.create(
-                                    response=response,
-                                    question=question,
-                                    selected_option=selected_option
-                                )
-                                logger.debug(f"Saved selected option for Question {question.id}: {selected_option.text}")
-
-                # Display a success message
-                survey_type = "republished" if survey.status == 'republished' else "published"
-                messages.success(request, f"Your response to the {survey_type} survey '{survey.name}' has been submitted successfully!")
-                return redirect('completion_message')
+        # Fetch the survey and ensure it is published or republished
+        survey = get_object_or_404(Survey, id=survey_id, status__in=['published', 'republished'], is_deleted=False)
 
+        try:
+            submit_response(survey, request.user, request.POST)
+        except SubmissionError as e:
+            messages.error(request, str(e))
+            return redirect('taker_dashboard')
         except Exception as e:
             # Log any unexpected errors for debugging
             logger.error(f"Error during survey submission: {e}", exc_info=True)
             messages.error(request, "An error occurred while submitting your response. Please try again.")
             return redirect('taker_dashboard')
 
+        # Display a success message
+        survey_type = "republished" if survey.status == 'republished' else "published"
+        messages.success(request, f"Your response to the {survey_type} survey '{survey.name}' has been submitted successfully!")
+        return redirect('completion_message')
+
     # Redirect to the taker dashboard if the request method is not POST
     messages.error(request, "Invalid request method.")
     return redirect('taker_dashboard')
@@ -678,6 +613,14 @@ def publish_survey(request, survey_id):
     try:
         survey = Survey.objects.get(id=survey_id, creator=request.user, is_deleted=False)
         if survey.status == Survey.DRAFT:
+            # Check the whole survey (two queries) before takers can see it
+            errors = validate_survey(survey)
+            if errors:
+                for error in errors:
+                    messages.error(request, error)
+                messages.warning(request, f"Survey '{survey.name}' was not published.")
+                return redirect('creator_dashboard')
+
             survey.status = Survey.PUBLISHED
             survey.save()
             messages.success(request, f"Survey '{survey.name}' has been published!")
@@ -714,33 +657,15 @@ def republish_survey(request, survey_id):
 
 def view_results(request, survey_id):
     """Display the final results of a closed survey."""
-    survey = get_object_or_404(Survey, id=survey_id, is_deleted=False)
+    survey = get_object_or_404(Survey.objects.select_related('results_snapshot'), id=survey_id, is_deleted=False)
     
     # Ensure the survey is closed
     if survey.status != 'closed':
         messages.error(request, "This survey is not closed yet.")
         return redirect('creator_dashboard')
     
-    results = []  # To store the results for display
-    
-    # Loop through each question and aggregate the results
-    for question in survey.questions.filter(is_deleted=False):
-        question_data = {
-            'text': question.text,
-            'options': []
-        }
-        total_responses = sum(option.answers.count() for option in question.options.all())
-        
-        for option in question.options.all():
-            selected_count = option.answers.count()
-            percentage = (selected_count / total_responses * 100) if total_responses > 0 else 0
-            question_data['options'].append({
-                'text': option.text,
-                'count': selected_count,
-                'percentage': round(percentage, 2)
-            })
-        
-        results.append(question_data)
+    # Serve the results frozen at close time (surveys closed before snapshots existed are frozen now)
+    results = freeze_results(survey).results
     
     return render(request, 'surveys/view_results.html', {
         'survey': survey,
@@ -752,13 +677,42 @@ def view_results(request, survey_id):
 
 
 
+def _survey_responses_page(request, survey):
+    """
+    Load one page of a survey's individual responses, newest first. With a `q` parameter,
+    only responses with a free-text answer containing it (found through the answer text index).
+    """
+    responses = Response.objects.filter(survey=survey).select_related('taker')
+    search = request.GET.get('q', '').strip()
+    if search:
+        matching = Answer.objects.filter(question__survey=survey, text__icontains=search).values('response')
+        responses = responses.filter(id__in=matching)
+    return search, paginate(responses, request.GET.get('cursor'), field='submitted_at')
+
+
+def _survey_response_table_survey(request, survey_id):
+    """Return the survey whose responses the user may view, or None."""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return None
+    survey = get_object_or_404(Survey, id=survey_id, is_deleted=False)
+    if not request.user.is_superuser and survey.creator_id != request.user.id:
+        return None
+    return survey
+
+
 def survey_response_table(request, survey_id):
     """Display the survey responses table with response counts and percentages for each option."""
-    # Get the survey object by id
-    survey = get_object_or_404(Survey, id=survey_id)
+    # Get the survey object by id; individual responses are only shown to its creator (or a superuser)
+    survey = _survey_response_table_survey(request, survey_id)
+    if survey is None:
+        messages.error(request, "Access denied! You are not authorized to view this survey's responses.")
+        return redirect('creator_dashboard' if request.user.is_authenticated else 'login')
 
     # Get all questions for the survey
-    questions = survey.questions.filter(is_deleted=False)
+    questions = survey.questions.filter(is_deleted=False).prefetch_related(live_options())
+
+    # Answer counts of every question and option, from the shared results cache
+    tally = get_results_tally(survey)
 
     # Initialize the results array
     results = []
@@ -770,32 +724,76 @@ def survey_response_table(request, survey_id):
             "options": [],
         }
 
-        # Get all options for the question
-        options = question.options.all()
-
         # Get total responses for this question (count of answers)
-        total_responses = Answer.objects.filter(question=question).count()
-
-        for option in options:
-            # Get the response count for each option
-            response_count = Answer.objects.filter(selected_option=option).count()
-
-            # Calculate percentage for the option
-            percentage = (response_count / total_responses * 100) if total_responses > 0 else 0
+        total_responses = tally.total(question)
 
+        for stats in tally.option_stats(question.options.all(), total=total_responses):
             # Append option data to the question's options list
             question_data["options"].append({
-                "text": option.text,
-                "response_count": response_count,
-                "percentage": round(percentage, 2)  # Round percentage to 2 decimal places
+                "text": stats["option"],
+                "response_count": stats["count"],
+                "percentage": stats["percentage"]  # Rounded to 2 decimal places
             })
 
         # Append question data to the results array
         results.append(question_data)
 
     # Pass the results and survey data to the template
+    # First page of the individual responses; older ones are fetched with "Load more"
+    search, page = _survey_responses_page(request, survey)
+
     return render(request, 'surveys/survey_response_table.html', {
         'page_title': f"Survey Responses: {survey.name}",
         'survey': survey,
         'results': results,
+        'responses': page.items,
+        'page': page,
+        'search': search,
+        'more_url': reverse('survey_response_table_more', args=[survey.id]),
+        'parquet_export': PARQUET_AVAILABLE,
+    })
+
+
+def export_survey_responses(request, survey_id):
+    """Download every response of the survey as CSV, streamed row by row."""
+    survey = _survey_response_table_survey(request, survey_id)
+    if survey is None:
+        messages.error(request, "Access denied! You are not authorized to export this survey's responses.")
+        return redirect('creator_dashboard' if request.user.is_authenticated else 'login')
+
+    logger.info(f"Exporting responses of survey {survey.id}")
+    return stream_responses_csv(survey)
+
+
+def export_survey_responses_parquet(request, survey_id):
+    """Download every response of the survey as a Parquet file for analytics tools."""
+    survey = _survey_response_table_survey(request, survey_id)
+    if survey is None:
+        messages.error(request, "Access denied! You are not authorized to export this survey's responses.")
+        return redirect('creator_dashboard' if request.user.is_authenticated else 'login')
+    if not PARQUET_AVAILABLE:
+        messages.error(request, "Parquet exports are not available on this server.")
+        return redirect('survey_response_table', survey_id=survey.id)
+
+    # Written batch by batch to a temporary file on disk, then streamed from it
+    export = tempfile.TemporaryFile()
+    count = write_responses_parquet(survey, export)
+    export.seek(0)
+    logger.info(f"Exported {count} responses of survey {survey.id} as Parquet")
+    return FileResponse(export, as_attachment=True, filename=f"survey-{survey.id}-responses.parquet")
+
+
+def survey_response_table_more(request, survey_id):
+    """Render the next page of a survey's responses as a fragment of table rows."""
+    survey = _survey_response_table_survey(request, survey_id)
+    if survey is None:
+        return redirect('creator_dashboard' if request.user.is_authenticated else 'login')
+
+    search, page = _survey_responses_page(request, survey)
+    return render(request, 'surveys/survey_response_table_more.html', {
+        'survey': survey,
+        'responses': page.items,
+        'page': page,
+        'search': search,
+        'more_url': reverse('survey_response_table_more', args=[survey.id]),
     })
\ No newline at end of file